@@ -16,29 +16,14 @@ TYPE_PALETTE = ["mediumblue", "darkorange", "wheat", "darkgray"]
 # ******************************************************************************
 # * Utility functions                                                          *
 # ******************************************************************************
-def _preprint_type_piechart(coll, year):
+def _preprint_type_piechart(data, year):
     ''' Create a preprint type pie chart
         Keyword arguments:
-          coll: dois collection
+          data: dictionary of preprint counts by institution
           year: year or "All"
         Returns:
           Chart components
     '''
-    match = {"type": "posted-content"}
-    if year != 'All':
-        match['jrc_publishing_date'] = {"$regex": "^"+ year}
-    payload = [{"$match": match},
-               {"$group": {"_id": {"institution": "$institution"},"count": {"$sum": 1}}}]
-    try:
-        rows = coll.aggregate(payload)
-    except Exception as err:
-        raise err
-    data = {}
-    for row in rows:
-        if not row['_id']['institution']:
-            data['No institution'] = row['count']
-        else:
-            data[row['_id']['institution'][0]['name']] = row['count']
     if not data:
         return None, None
     title = "Preprint DOI institutions"
@@ -48,29 +33,14 @@ def _preprint_type_piechart(coll, year):
                      "source", width=600, height=400, location='bottom_right')
 
 
-def _preprint_capture_piechart(coll, year):
+def _preprint_capture_piechart(data, year):
     ''' Create a preprint capture pie chart
         Keyword arguments:
-          coll: dois collection
+          data: dictionary of preprint counts by capture method
           year: year or "All"
         Returns:
           Chart components
     '''
-    data = {}
-    payload = {"subtype": "preprint", "jrc_preprint": {"$exists": 1},
-               "relation.is-preprint-of": {"$exists": 0}}
-    if year != 'All':
-        payload['jrc_publishing_date'] = {"$regex": "^"+ year}
-    try:
-        data['Fuzzy matching'] = coll.count_documents(payload)
-    except Exception as err:
-        raise err
-    del payload['relation.is-preprint-of']
-    try:
-        data['Crossref relation'] = coll.count_documents(payload)
-    except Exception as err:
-        raise err
-    data['Crossref relation'] = data['Crossref relation'] - data['Fuzzy matching']
     if not data['Crossref relation'] and not data['Fuzzy matching']:
         return None, None
     title = "Preprint capture method"
@@ -79,12 +49,13 @@ def _preprint_capture_piechart(coll, year):
     return pie_chart(data, title, "source", colors=SOURCE_PALETTE, width=600, height=400)
 
 
-def preprint_pie_charts(data, year, coll):
+def preprint_pie_charts(data, year, institution, capture):
     ''' Create a preprint capture pie chart
         Keyword arguments:
           data: dictionary of data
           year: year or "All"
-          coll: dois collection
+          institution: dictionary of preprint counts by institution
+          capture: dictionary of preprint counts by capture method
         Returns:
           Chart components
     '''
@@ -94,21 +65,15 @@ def preprint_pie_charts(data, year, coll):
     chartscript, chartdiv = pie_chart(data, title, "source",
                                       colors=SOURCE_PALETTE, width=600, height=400)
     # Preprint types
-    try:
-        script2, div2 = _preprint_type_piechart(coll, year)
-        if script2:
-            chartscript += script2
-            chartdiv += div2
-    except Exception as err:
-        raise err
+    script2, div2 = _preprint_type_piechart(institution, year)
+    if script2:
+        chartscript += script2
+        chartdiv += div2
     # Preprint capture
-    try:
-        script2, div2 = _preprint_capture_piechart(coll, year)
-        if script2:
-            chartscript += script2
-            chartdiv += div2
-    except Exception as err:
-        raise err
+    script2, div2 = _preprint_capture_piechart(capture, year)
+    if script2:
+        chartscript += script2
+        chartdiv += div2
     return chartscript, chartdiv
 
 # ******************************************************************************
@@ -2,24 +2,38 @@
     UI and REST API for Data and Information Services
 '''
 
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import date, datetime, timedelta
+from functools import partial
 from html import escape
 import inspect
+from io import StringIO
+from itertools import chain
 import json
 from json import JSONEncoder
+import math
 from operator import attrgetter, itemgetter
 import os
 import random
 import re
 import string
 import sys
-from time import time
+from threading import Lock
+from time import perf_counter, time
+from urllib.parse import quote
 from bokeh.palettes import all_palettes, plasma
 import bson
-from flask import (Flask, make_response, render_template, request, jsonify, send_file)
+from flask import (Flask, Response, g, make_response, render_template, request, jsonify,
+                   send_file, stream_with_context)
 from flask_cors import CORS
 from flask_swagger import swagger
+from werkzeug.http import http_date
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import orjson
 import jrc_common.jrc_common as JRC
 import doi_common.doi_common as DL
 import dis_plots as DP
@@ -29,10 +43,41 @@ import dis_plots as DP
 __version__ = "25.0.0"
 # Database
 DB = {}
+# Cached query results (key: (expiration time, value))
+CACHE = {}
+CACHE_MAXSIZE = 4096
+CACHE_LOCK = Lock()
+ROLLUP_TTL = 3600
+# Cursor batch size for endpoints that return many rows
+BATCH_SIZE = 1000
+# ORCID API records are cached for this many seconds
+ORCID_TTL = 3600
+# Crossref/DataCite records are cached for this many seconds
+DOI_TTL = 3600
+# HTTP session for external APIs (reuses connections, retries transient gateway errors)
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20,
+                                      max_retries=Retry(total=3, backoff_factor=0.2,
+                                                        status_forcelist=(502, 503, 504),
+                                                        raise_on_status=False)))
+# Queries slower than this (in seconds) are logged
+SLOW_QUERY = 1.0
+# Large DOI fields that citations don't need (author, title, journal and date fields are
+# kept for DL)
+CITATION_EXCLUDE = {"_id": 0, "funder": 0, "license": 0, "link": 0, "reference": 0,
+                    "relatedIdentifiers": 0, "relation": 0}
+# Works tables don't need author lists or abstracts either
+WORKS_EXCLUDE = {**CITATION_EXCLUDE, "abstract": 0, "author": 0, "creators": 0,
+                 "descriptions": 0}
+# Downloadable files up to this many characters are embedded in the page as data URIs (quoting
+# can triple their size, and they're sent on every render)
+DOWNLOAD_INLINE = 4096
+# ORCID IDs (as opposed to names)
+ORCID_REGEX = re.compile(r'([0-9A-Z]{4}-){3}[0-9A-Z]+')
+# Characters for random strings
+ALPHANUMERIC = string.ascii_letters + string.digits
 # Custom queries
-CUSTOM_REGEX = {"publishing_year": {"field": "jrc_publishing_date",
-                                    "value": "^!REPLACE!"}
-               }
+CUSTOM_RANGE = {"publishing_year": "jrc_publishing_date"}
 
 # Navigation
 NAV = {"Home": "",
@@ -67,6 +112,13 @@ NAV = {"Home": "",
 
 # Dates
 OPSTART = datetime.strptime('2024-05-16','%Y-%m-%d')
+# First publishing year shown in yearly reports
+FIRST_YEAR = 2006
+MONTH_NAMES = [date(1900, mon, 1).strftime('%B') for mon in range(1, 13)]
+# JSON encoding
+OBJECTID = bson.objectid.ObjectId
+# Dates are passed through to CustomJSONEncoder, which formats them as HTTP dates (like Flask)
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SORT_KEYS
 
 # ******************************************************************************
 # * Classes                                                                    *
@@ -75,18 +127,32 @@ OPSTART = datetime.strptime('2024-05-16','%Y-%m-%d')
 class CustomJSONEncoder(JSONEncoder):
     ''' Define a custom JSON encoder
     '''
+    @staticmethod
+    def format_timedelta(o):
+        ''' Format a timedelta as HH:MM:SS.ss
+        '''
+        seconds = o.total_seconds()
+        hours = int(seconds // 3600)
+        minutes = int((seconds % 3600) // 60)
+        seconds = seconds % 60
+        return f"{hours:02d}:{minutes:02d}:{seconds:.02f}"
+
     def default(self, o):
+        # Exact type checks for the common cases, most frequent first
+        otype = type(o)
+        if otype is datetime:
+            return http_date(o)
+        if otype is OBJECTID:
+            return str(o)
+        if otype is timedelta:
+            return self.format_timedelta(o)
         try:
-            if isinstance(o, bson.objectid.ObjectId):
+            if isinstance(o, OBJECTID):
                 return str(o)
-            if isinstance(o, datetime):
-                return o.strftime("%a, %-d %b %Y %H:%M:%S")
+            if isinstance(o, date):
+                return http_date(o)
             if isinstance(o, timedelta):
-                seconds = o.total_seconds()
-                hours = seconds // 3600
-                minutes = (seconds % 3600) // 60
-                seconds = seconds % 60
-                return f"{hours:02d}:{minutes:02d}:{seconds:.02f}"
+                return self.format_timedelta(o)
             iterable = iter(o)
         except TypeError:
             pass
@@ -127,40 +193,57 @@ class CustomException(Exception):
         self.preface = f"In {cfunc}, {preface}" if preface else f"Error in {cfunc}."
 
 
+class DatabaseException(Exception):
+    ''' Class to populate error return for HTML when a database call fails.
+    '''
+    def __init__(self, title, original):
+        super().__init__(title)
+        self.title = title
+        self.original = original
+
+
 # ******************************************************************************
 # * Flask                                                                      *
 # ******************************************************************************
 
 app = Flask(__name__, template_folder="templates")
 app.json_encoder = CustomJSONEncoder
+JSON_ENCODER = CustomJSONEncoder()
 app.config.from_pyfile("config.cfg")
 CORS(app, supports_credentials=True)
 app.config["STARTDT"] = datetime.now()
+app.config["ENDPOINTS"] = Counter()
 app.config["LAST_TRANSACTION"] = time()
 
 
+def initialize_database():
+    ''' Connect to the dis database
+        Keyword arguments:
+          None
+        Returns:
+          None
+    '''
+    dbconfig = JRC.get_config("databases")
+    dbo = attrgetter("dis.prod.write")(dbconfig)
+    print(f"Connecting to {dbo.name} prod on {dbo.host} as {dbo.user}")
+    DB['dis'] = JRC.connect_database(dbo)
+
+
 @app.before_request
 def before_request():
     ''' Set transaction start time and increment counters.
-        If needed, initilize global variables.
+        If the startup database connection failed, retry it.
     '''
     if not DB:
         try:
-            dbconfig = JRC.get_config("databases")
-        except Exception as err:
-            return render_template('warning.html', urlroot=request.url_root,
-                                   title=render_warning("Config error"), message=err)
-        dbo = attrgetter("dis.prod.write")(dbconfig)
-        print(f"Connecting to {dbo.name} prod on {dbo.host} as {dbo.user}")
-        try:
-            DB['dis'] = JRC.connect_database(dbo)
+            initialize_database()
         except Exception as err:
             return render_template('warning.html', urlroot=request.url_root,
                                    title=render_warning("Database connect error"), message=err)
-    app.config["START_TIME"] = time()
-    app.config["COUNTER"] += 1
-    endpoint = request.endpoint if request.endpoint else "(Unknown)"
-    app.config["ENDPOINTS"][endpoint] = app.config["ENDPOINTS"].get(endpoint, 0) + 1
+    g.start_time = time()
+    config = app.config
+    config["COUNTER"] += 1
+    config["ENDPOINTS"][request.endpoint or "(Unknown)"] += 1
     if request.method == "OPTIONS":
         result = initialize_result()
         return generate_response(result)
@@ -181,6 +264,39 @@ def handle_invalid_usage(error):
     return response
 
 
+@app.errorhandler(DatabaseException)
+def handle_database_exception(error):
+    ''' Error handler for failed database calls in UI endpoints
+        Keyword arguments:
+          error: error object
+    '''
+    return render_template('error.html', urlroot=request.url_root,
+                           title=render_warning(error.title),
+                           message=error_message(error.original))
+
+
+@contextmanager
+def mongo_guard(title):
+    ''' Time a block of database calls and render an error page if any of them fail.
+        Usable as a context manager or as a decorator.
+        Keyword arguments:
+          title: error title to display
+        Returns:
+          None
+    '''
+    start = perf_counter()
+    try:
+        yield
+    except DatabaseException:
+        raise
+    except Exception as err:
+        raise DatabaseException(title, err) from err
+    finally:
+        elapsed = perf_counter() - start
+        if elapsed > SLOW_QUERY:
+            print(f"Slow query in {request.endpoint} ({elapsed:.3f}s): {title}")
+
+
 def error_message(err):
     ''' Create an error message from an exception
         Keyword arguments:
@@ -248,13 +364,15 @@ def render_warning(msg, severity='error', size='lg'):
 def generate_navbar(active):
     ''' Generate the web navigation bar
         Keyword arguments:
-          Navigation bar
+          active: active section
+        Returns:
+          Navigation bar HTML
     '''
-    nav = '''
+    nav = ['''
     <nav class="navbar navbar-expand-lg navbar-dark bg-dark">
       <div class="collapse navbar-collapse" id="navbarSupportedContent">
         <ul class="navbar-nav mr-auto">
-    '''
+    ''']
     for heading, subhead in NAV.items():
         basic = '<li class="nav-item active">' if heading == active else '<li class="nav-item">'
         drop = '<li class="nav-item dropdown active">' if heading == active \
@@ -264,20 +382,24 @@ def generate_navbar(active):
                    + f"aria-expanded=\"false\">{heading}</a><div class=\"dropdown-menu\" "\
                    + 'aria-labelledby="navbarDropdown">'
         if subhead:
-            nav += drop + menuhead
+            nav.extend([drop, menuhead])
             for itm, val in subhead.items():
                 if itm == 'divider':
-                    nav += "<div class='dropdown-divider'></div>"
+                    nav.append("<div class='dropdown-divider'></div>")
                     continue
                 link = f"/{val}" if val else ('/' + itm.replace(" ", "_")).lower()
-                nav += f"<a class='dropdown-item' href='{link}'>{itm}</a>"
-            nav += '</div></li>'
+                nav.append(f"<a class='dropdown-item' href='{link}'>{itm}</a>")
+            nav.append('</div></li>')
         else:
-            nav += basic
+            nav.append(basic)
             link = ('/' + heading.replace(" ", "_")).lower()
-            nav += f"<a class='nav-link' href='{link}'>{heading}</a></li>"
-    nav += '</ul></div></nav>'
-    return nav
+            nav.append(f"<a class='nav-link' href='{link}'>{heading}</a></li>")
+    nav.append('</ul></div></nav>')
+    return "".join(nav)
+
+
+# Navigation bars for each section (NAV doesn't change, so they're built once)
+NAVBARS = {heading: generate_navbar(heading) for heading in NAV}
 
 # ******************************************************************************
 # * Payload utility functions                                                  *
@@ -290,18 +412,14 @@ def receive_payload():
         Returns:
           payload dictionary
     '''
-    pay = {}
-    if not request.get_data():
-        return pay
     try:
         if request.form:
-            for itm in request.form:
-                pay[itm] = request.form[itm]
-        elif request.json:
-            pay = request.json
+            return request.form.to_dict()
+        if request.get_data():
+            return request.get_json() or {}
     except Exception as err:
         raise InvalidUsage(str(err), 500) from err
-    return pay
+    return {}
 
 
 def initialize_result():
@@ -322,6 +440,17 @@ def initialize_result():
     return result
 
 
+def encode_json(obj):
+    ''' Encode an object as JSON. orjson encodes the common types in C, and hands anything
+        else (ObjectIds, datetimes, timedeltas, other iterables) to CustomJSONEncoder.
+        Keyword arguments:
+          obj: object to encode
+        Returns:
+          JSON bytes
+    '''
+    return orjson.dumps(obj, default=JSON_ENCODER.default, option=ORJSON_OPTIONS)
+
+
 def generate_response(result):
     ''' Generate a response to a request
         Keyword arguments:
@@ -329,8 +458,75 @@ def generate_response(result):
         Returns:
           JSON response
     '''
-    result["rest"]["elapsed_time"] = str(timedelta(seconds=time() - app.config["START_TIME"]))
-    return jsonify(**result)
+    result["rest"]["elapsed_time"] = str(timedelta(seconds=time() - g.start_time))
+    return app.response_class(encode_json(result), mimetype='application/json')
+
+
+def generate_stream_response(result, rows):
+    ''' Generate a streamed response to a request. Records are encoded as they are read, so
+        large results are never held in memory.
+        Keyword arguments:
+          result: result dictionary
+          rows: records (usually a cursor) to return as result['data']
+        Returns:
+          Streamed JSON response
+    '''
+    start = g.start_time
+
+    def generate():
+        ''' Yield the response in pieces, with the rest block last
+        '''
+        yield b'{"data": ['
+        for idx, row in enumerate(rows):
+            yield (b"," if idx else b"") + encode_json(row)
+            result['rest']['row_count'] = idx + 1
+        result["rest"]["elapsed_time"] = str(timedelta(seconds=time() - start))
+        yield b'], "rest": ' + encode_json(result['rest']) + b'}'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+
+def start_cursor(rows):
+    ''' Read the first record from a cursor. This runs the query, so query errors are raised
+        before a streamed response has started.
+        Keyword arguments:
+          rows: cursor
+        Returns:
+          Iterable of all records
+    '''
+    first = next(rows, None)
+    return [] if first is None else chain([first], rows)
+
+
+def conditional_response(response, etag=None, max_age=60):
+    ''' Make a response cacheable by the client. If the client already has the current
+        version (matching ETag), the response becomes a 304 Not Modified.
+        Keyword arguments:
+          response: response object
+          etag: ETag (if None, one is computed from the response body)
+          max_age: seconds the client may reuse the response without revalidating
+        Returns:
+          Response object
+    '''
+    if etag:
+        response.set_etag(etag)
+    else:
+        response.add_etag()
+    response.cache_control.max_age = max_age
+    response.cache_control.must_revalidate = True
+    return response.make_conditional(request)
+
+
+def period_etag(name, period):
+    ''' Get an ETag that changes once per period. This lets a page answer a revalidation
+        without doing any of the work needed to render it.
+        Keyword arguments:
+          name: page name
+          period: seconds between ETag changes
+        Returns:
+          ETag
+    '''
+    return f"{name}-{int(time() // period)}"
 
 
 def get_custom_payload(ipd, display_value):
@@ -342,10 +538,9 @@ def get_custom_payload(ipd, display_value):
           payload: payload for MongoDB find
           ptitle: page title
     '''
-    if ipd['field'] in CUSTOM_REGEX:
-        rex = CUSTOM_REGEX[ipd['field']]['value']
-        ipd['value'] = {"$regex": rex.replace("!REPLACE!", ipd['value'])}
-        ipd['field'] = CUSTOM_REGEX[ipd['field']]['field']
+    if ipd['field'] in CUSTOM_RANGE:
+        ipd['value'] = year_match(ipd['value'])
+        ipd['field'] = CUSTOM_RANGE[ipd['field']]
     ptitle = f"DOIs for {ipd['field']} {display_value}"
     payload = {ipd['field']: ipd['value']}
     if 'jrc_obtained_from' in ipd and ipd['jrc_obtained_from']:
@@ -353,10 +548,41 @@ def get_custom_payload(ipd, display_value):
         ptitle += f" from {ipd['jrc_obtained_from']}"
     return payload, ptitle
 
+
+def year_match(year):
+    ''' Generate a range query for publishing dates that start with a given year
+        Keyword arguments:
+          year: year (YYYY) or year and month (YYYY-MM)
+        Returns:
+          MongoDB range query (or anchored regex for anything else)
+    '''
+    # The upper bound is the next period rather than a bumped last character: under a
+    # collation, "201:" sorts before "2019"
+    if re.fullmatch(r"\d{4}", year):
+        return {"$gte": year, "$lt": str(int(year) + 1)}
+    if re.fullmatch(r"\d{4}-\d{2}", year):
+        yr, mon = int(year[:4]), int(year[5:])
+        upper = f"{yr + 1}-01" if mon >= 12 else f"{yr}-{mon + 1:02}"
+        return {"$gte": year, "$lt": upper}
+    return {"$regex": f"^{re.escape(year)}"}
+
 # ******************************************************************************
 # * ORCID utility functions                                                    *
 # ******************************************************************************
 
+def get_orcid_record(oid):
+    ''' Get a record from the ORCID API. Found records are cached.
+        Keyword arguments:
+          oid: ORCID ID
+        Returns:
+          ORCID record (or ORCID error response)
+    '''
+    return cached(f"orcid_{oid}", lambda: SESSION.get(f"{app.config['ORCID']}{oid}",
+                                                      headers={"Accept": "application/json"},
+                                                      timeout=10).json(),
+                  ttl=ORCID_TTL, keep=lambda rec: 'person' in rec)
+
+
 def get_work_publication_date(wsumm):
     ''' Get a publication date from an ORCID work summary
         Keyword arguments:
@@ -365,14 +591,16 @@ def get_work_publication_date(wsumm):
           Publication date
     '''
     pdate = ''
-    if 'publication-date' in wsumm and wsumm['publication-date']:
-        ppd = wsumm['publication-date']
-        if 'year' in ppd and ppd['year']['value']:
-            pdate = ppd['year']['value']
-        if 'month' in ppd and ppd['month'] and ppd['month']['value']:
-            pdate += f"-{ppd['month']['value']}"
-        if 'day' in ppd and ppd['day'] and ppd['day']['value']:
-            pdate += f"-{ppd['day']['value']}"
+    ppd = wsumm.get('publication-date')
+    if not ppd:
+        return pdate
+    year, month, day = ppd.get('year'), ppd.get('month'), ppd.get('day')
+    if year and year['value']:
+        pdate = year['value']
+    if month and month['value']:
+        pdate += f"-{month['value']}"
+    if day and day['value']:
+        pdate += f"-{day['value']}"
     return pdate
 
 
@@ -388,8 +616,9 @@ def get_work_doi(work):
     for eid in work['external-ids']['external-id']:
         if eid['external-id-type'] != 'doi':
             continue
-        if 'external-id-normalized' in eid:
-            return eid['external-id-normalized']['value']
+        normalized = eid.get('external-id-normalized')
+        if normalized:
+            return normalized['value']
         if 'external-id-value' in eid:
             return eid['external-id-url']['value']
     return ''
@@ -404,18 +633,18 @@ def orcid_payload(oid, orc, eid=None):
         Returns:
           Payload
     '''
-    # Name only search
-    payload = {"$and": [{"$or": [{"author.given": {"$in": orc['given']}},
-                                 {"creators.givenName": {"$in": orc['given']}}]},
-                        {"$or": [{"author.family": {"$in": orc['family']}},
-                                 {"creators.familyName": {"$in": orc['family']}}]}]
-              }
+    # Name only search. Crossref names are in author and DataCite names are in creators, so
+    # each $or clause can use its own (family, given) index.
+    names = [{"author.family": {"$in": orc['family']}, "author.given": {"$in": orc['given']}},
+             {"creators.familyName": {"$in": orc['family']},
+              "creators.givenName": {"$in": orc['given']}}]
+    payload = {"$or": names}
     if eid and not oid:
         # Employee ID only search
-        payload = {"$or": [{"jrc_author": eid}, {"$and": payload["$and"]}]}
+        payload = {"$or": [{"jrc_author": eid}, *names]}
     elif oid and eid:
         # Search by either name or employee ID
-        payload = {"$or": [{"orcid": oid}, {"jrc_author": eid}, {"$and": payload["$and"]}]}
+        payload = {"$or": [{"orcid": oid}, {"jrc_author": eid}, *names]}
     return payload
 
 
@@ -437,7 +666,7 @@ def get_dois_for_orcid(oid, orc, use_eid, both):
             payload = orcid_payload(oid, orc, eid)
         else:
             payload = orcid_payload(oid, orc)
-        rows = DB['dis'].dois.find(payload)
+        rows = DB['dis'].dois.find(payload, WORKS_EXCLUDE)
     except Exception as err:
         raise CustomException(err, "Could not find in dois collection by name.") from err
     return rows
@@ -455,7 +684,7 @@ def generate_works_table(rows, name=None):
     dois = []
     authors = {}
     html = ""
-    fileoutput = ""
+    fileoutput = StringIO()
     for row in rows:
         doi = doi_link(row['doi']) if row['doi'] else "&nbsp;"
         if 'title' in row and isinstance(row['title'], str):
@@ -468,7 +697,7 @@ def generate_works_table(rows, name=None):
                    "title": title
                   }
         works.append(payload)
-        fileoutput += f"{payload['date']}\t{row['doi']}\t{payload['title']}\n"
+        fileoutput.write(f"{payload['date']}\t{row['doi']}\t{payload['title']}\n")
         if name:
             alist = DL.get_author_details(row)
             if alist:
@@ -480,17 +709,20 @@ def generate_works_table(rows, name=None):
                 print(f"Could not get author details for {row['doi']}")
     if not works:
         return html, []
-    html += "<table id='pubs' class='tablesorter standard'>" \
-            + '<thead><tr><th>Published</th><th>DOI</th><th>Title</th></tr></thead><tbody>'
-    for work in sorted(works, key=lambda row: row['date'], reverse=True):
-        html += f"<tr><td>{work['date']}</td><td>{work['doi'] if work['doi'] else '&nbsp;'}</td>" \
-                + f"<td>{work['title']}</td></tr>"
+    trows = ["<table id='pubs' class='tablesorter standard'>" \
+             + '<thead><tr><th>Published</th><th>DOI</th><th>Title</th></tr></thead><tbody>']
+    for work in sorted(works, key=itemgetter('date'), reverse=True):
+        trows.append(f"<tr><td>{work['date']}</td>" \
+                     + f"<td>{work['doi'] if work['doi'] else '&nbsp;'}</td>" \
+                     + f"<td>{work['title']}</td></tr>")
     if dois:
-        html += "</tbody></table>"
+        trows.append("</tbody></table>")
+    html = "".join(trows)
     if authors:
         html = f"<br>Authors found: {', '.join(sorted(authors.keys()))}<br>" \
                + f"This may include non-Janelia authors<br>{html}"
-    html = create_downloadable('works', ['Published', 'DOI', 'Title'], fileoutput) + html
+    html = create_downloadable('works', ['Published', 'DOI', 'Title'], fileoutput.getvalue()) \
+           + html
     html = f"DOIs: {len(works)}<br>" + html
     return html, dois
 
@@ -515,19 +747,20 @@ def get_orcid_from_db(oid, use_eid=False, both=False, bare=False):
         raise CustomException(err, "Could not find_one in orcid collection by ORCID ID.") from err
     if not orc:
         return "", []
-    html = "<br><table class='borderless'>"
+    html = ["<br><table class='borderless'>"]
     if use_eid and 'orcid' in orc:
-        html += f"<tr><td>ORCID:</td><td><a href='https://orcid.org/{orc['orcid']}'>" \
-                + f"{orc['orcid']}</a></td></tr>"
-    html += f"<tr><td>Given name:</td><td>{', '.join(sorted(orc['given']))}</td></tr>"
-    html += f"<tr><td>Family name:</td><td>{', '.join(sorted(orc['family']))}</td></tr>"
+        html.append(f"<tr><td>ORCID:</td><td><a href='https://orcid.org/{orc['orcid']}'>" \
+                    + f"{orc['orcid']}</a></td></tr>")
+    html.append(f"<tr><td>Given name:</td><td>{', '.join(sorted(orc['given']))}</td></tr>")
+    html.append(f"<tr><td>Family name:</td><td>{', '.join(sorted(orc['family']))}</td></tr>")
     if 'userIdO365' in orc:
         link = "<a href='" + f"{app.config['WORKDAY']}{orc['userIdO365']}" \
                + f"' target='_blank'>{orc['userIdO365']}</a>"
-        html += f"<tr><td>User ID:</td><td>{link}</td></tr>"
+        html.append(f"<tr><td>User ID:</td><td>{link}</td></tr>")
     if 'affiliations' in orc:
-        html += f"<tr><td>Affiliations:</td><td>{', '.join(orc['affiliations'])}</td></tr>"
-    html += "</table><br>"
+        html.append(f"<tr><td>Affiliations:</td><td>{', '.join(orc['affiliations'])}</td></tr>")
+    html.append("</table><br>")
+    html = "".join(html)
     try:
         if use_eid:
             oid = orc['employeeId']
@@ -550,8 +783,10 @@ def add_orcid_works(data, dois):
         Returns:
           HTML for a list of works from ORCID
     '''
-    html = inner = ""
+    html = ""
+    inner = []
     works = 0
+    dois = set(dois)
     for work in data['activities-summary']['works']['group']:
         wsumm = work['work-summary'][0]
         pdate = get_work_publication_date(wsumm)
@@ -559,20 +794,13 @@ def add_orcid_works(data, dois):
         if (not doi) or (doi in dois):
             continue
         works += 1
-        if not doi:
-            inner += f"<tr><td>{pdate}</td><td>&nbsp;</td>" \
-                     + f"<td>{wsumm['title']['title']['value']}</td></tr>"
-            continue
-        link = ""
-        if work['external-ids']['external-id'][0]['external-id-url']:
-            if work['external-ids']['external-id'][0]['external-id-url']:
-                link = "<a href='" \
-                       + work['external-ids']['external-id'][0]['external-id-url']['value'] \
-                       + f"' target='_blank'>{doi}</a>"
+        eurl = work['external-ids']['external-id'][0]['external-id-url']
+        if eurl:
+            link = f"<a href='{eurl['value']}' target='_blank'>{doi}</a>"
         else:
             link = doi_link(doi)
-        inner += f"<tr><td>{pdate}</td><td>{link}</td>" \
-                 + f"<td>{wsumm['title']['title']['value']}</td></tr>"
+        inner.append(f"<tr><td>{pdate}</td><td>{link}</td>" \
+                     + f"<td>{wsumm['title']['title']['value']}</td></tr>")
     if inner:
         title = "title is" if works == 1 else f"{works} titles are"
         html += f"<hr>The additional {title} from ORCID. Note that titles below may " \
@@ -580,7 +808,7 @@ def add_orcid_works(data, dois):
                 + "employment outside of Janelia.</br>"
         html += '<table id="works" class="tablesorter standard"><thead><tr>' \
                 + '<th>Published</th><th>DOI</th><th>Title</th>' \
-                + f"</tr></thead><tbody>{inner}</tbody></table>"
+                + f"</tr></thead><tbody>{''.join(inner)}</tbody></table>"
     return html
 
 
@@ -592,9 +820,11 @@ def generate_user_table(rows):
           HTML for a list of authors with a count
     '''
     count = 0
-    html = '<table id="ops" class="tablesorter standard"><thead><tr>' \
-           + '<th>ORCID</th><th>Given name</th><th>Family name</th>' \
-           + '<th>Status</th></tr></thead><tbody>'
+    cbutton = "<button class=\"btn btn-outline-warning\" " \
+              + "onclick=\"$('.other').toggle();\">Filter for current authors</button>"
+    html = [cbutton + '<table id="ops" class="tablesorter standard"><thead><tr>' \
+            + '<th>ORCID</th><th>Given name</th><th>Family name</th>' \
+            + '<th>Status</th></tr></thead><tbody>']
     for row in rows:
         count += 1
         if 'orcid' in row:
@@ -606,18 +836,25 @@ def generate_user_table(rows):
         auth = DL.get_single_author_details(row, DB['dis'].orcid)
         badges = get_badges(auth)
         rclass = 'other' if (auth and auth['alumni']) else 'active'
-        html += f"<tr class={rclass}><td>{link}</td><td>{', '.join(row['given'])}</td>" \
-                + f"<td>{', '.join(row['family'])}</td><td>{' '.join(badges)}</td></tr>"
-    html += '</tbody></table>'
-    cbutton = "<button class=\"btn btn-outline-warning\" " \
-              + "onclick=\"$('.other').toggle();\">Filter for current authors</button>"
-    html = cbutton + html
-    return html, count
+        html.append(f"<tr class={rclass}><td>{link}</td><td>{', '.join(row['given'])}</td>" \
+                    + f"<td>{', '.join(row['family'])}</td><td>{' '.join(badges)}</td></tr>")
+    html.append('</tbody></table>')
+    return "".join(html), count
 
 # ******************************************************************************
 # * DOI utility functions                                                      *
 # ******************************************************************************
 
+def normalize_doi(doi):
+    ''' Normalize a DOI taken from a URL path or payload
+        Keyword arguments:
+          doi: DOI
+        Returns:
+          DOI without leading/trailing slashes, in lowercase
+    '''
+    return doi.strip('/').lower()
+
+
 def doi_link(doi):
     ''' Return a link to a DOI or DOIs
         Keyword arguments:
@@ -639,22 +876,23 @@ def doi_link(doi):
 
 
 def get_doi(doi):
-    ''' Get a single DOI record
+    ''' Get a single DOI record from Crossref or DataCite. Found records are cached.
         Keyword arguments:
           doi: DOI
         Returns:
           source: data source
           data: data from response
     '''
-    if DL.is_datacite(doi):
-        resp = JRC.call_datacite(doi)
-        source = 'datacite'
-        data = resp['data']['attributes'] if 'data' in resp else {}
-    else:
+    def call_source():
+        ''' Call the DOI's registration agency
+        '''
+        if DL.is_datacite(doi):
+            resp = JRC.call_datacite(doi)
+            return 'datacite', resp['data']['attributes'] if 'data' in resp else {}
         resp = JRC.call_crossref(doi)
-        source = 'crossref'
-        data = resp['message'] if 'message' in resp else {}
-    return source, data
+        return 'crossref', resp['message'] if 'message' in resp else {}
+
+    return cached(f"doi_{doi}", call_source, ttl=DOI_TTL, keep=lambda resp: bool(resp[1]))
 
 
 def add_jrc_fields(row):
@@ -664,12 +902,11 @@ def add_jrc_fields(row):
         Returns:
           HTML
     '''
-    jrc = {}
-    prog = re.compile("^jrc_")
-    for key, val in row.items():
-        if not re.match(prog, key) or key in app.config['DO_NOT_DISPLAY']:
-            continue
-        if isinstance(val, list) and key not in ('jrc_preprint'):
+    hidden = app.config['DO_NOT_DISPLAY']
+    html = []
+    for key in sorted(key for key in row if key.startswith("jrc_") and key not in hidden):
+        val = row[key]
+        if isinstance(val, list) and key != 'jrc_preprint':
             try:
                 if isinstance(val[0], dict):
                     val = ", ".join(sorted(elem['name'] for elem in val))
@@ -677,27 +914,17 @@ def add_jrc_fields(row):
                     val = ", ".join(sorted(val))
             except TypeError:
                 val = json.dumps(val)
-        jrc[key] = val
-    if not jrc:
-        return ""
-    html = '<table class="standard">'
-    for key in sorted(jrc):
-        val = jrc[key]
         if key == 'jrc_author':
-            link = []
-            for auth in val.split(", "):
-                link.append(f"<a href='/userui/{auth}'>{auth}</a>")
-            val = ", ".join(link)
+            val = ", ".join(f"<a href='/userui/{auth}'>{auth}</a>" for auth in val.split(", "))
         if key == 'jrc_preprint':
             val = doi_link(val)
         elif 'jrc_tag' in key:
-            link = []
-            for aff in val.split(", "):
-                link.append(f"<a href='/affiliation/{escape(aff)}'>{aff}</a>")
-            val = ", ".join(link)
-        html += f"<tr><td>{key}</td><td>{val}</td></tr>"
-    html += "</table><br>"
-    return html
+            val = ", ".join(f"<a href='/affiliation/{escape(aff)}'>{aff}</a>"
+                            for aff in val.split(", "))
+        html.append(f"<tr><td>{key}</td><td>{val}</td></tr>")
+    if not html:
+        return ""
+    return f'<table class="standard">{"".join(html)}</table><br>'
 
 
 def add_relations(row):
@@ -707,31 +934,32 @@ def add_relations(row):
         Returns:
           HTML
     '''
-    html = ""
-    if "relation" in row and row['relation']:
+    html = []
+    if row.get('relation'):
         # Crossref relations
-        for rel in row['relation']:
-            used = []
-            for itm in row['relation'][rel]:
-                if itm['id'] in used:
+        for rel, items in row['relation'].items():
+            used = set()
+            desc = rel.replace('-', ' ')
+            for itm in items:
+                rid = itm['id']
+                if rid in used:
                     continue
-                html += f"This DOI {rel.replace('-', ' ')} {doi_link(itm['id'])}<br>"
-                used.append(itm['id'])
-    elif 'relatedIdentifiers' in row and row['relatedIdentifiers']:
+                html.append(f"This DOI {desc} {doi_link(rid)}<br>")
+                used.add(rid)
+    elif row.get('relatedIdentifiers'):
         # DataCite relations
         for rel in row['relatedIdentifiers']:
-            if 'relatedIdentifierType' in rel and rel['relatedIdentifierType'] == 'DOI':
+            if rel.get('relatedIdentifierType') == 'DOI':
                 words = re.split('(?<=.)(?=[A-Z])', rel['relationType'])
-                html += f"This DOI {' '.join(wrd.lower() for wrd in words)} " \
-                        + f"{doi_link(rel['relatedIdentifier'])}<br>"
-    return html
+                html.append(f"This DOI {' '.join(wrd.lower() for wrd in words)} " \
+                            + f"{doi_link(rel['relatedIdentifier'])}<br>")
+    return "".join(html)
 
 
 def get_migration_data(row):
     ''' Create a migration record for a single DOI
         Keyword arguments:
-          doi: doi record
-          orgs: dictionary of organizations/codes
+          row: DOI record
         Returns:
           migration dictionary
     '''
@@ -765,6 +993,24 @@ def get_migration_data(row):
     return rec
 
 
+def get_citation_components(row, style='dis'):
+    ''' Get the components of a citation from a DOI record
+        Keyword arguments:
+          row: DOI record
+          style: citation style (dis or flylight)
+        Returns:
+          Dictionary of citation components
+    '''
+    record = {"authors": DL.get_author_list(row, style=style, returntype="list"),
+              "journal": DL.get_journal(row),
+              "publishing_date": DL.get_publishing_date(row),
+              "title": DL.get_title(row)
+             }
+    if row['jrc_obtained_from'] == 'Crossref' and 'abstract' in row:
+        record['abstract'] = row['abstract']
+    return record
+
+
 def compute_preprint_data(rows):
     ''' Create a dictionaries of preprint data
         Keyword arguments:
@@ -822,26 +1068,21 @@ def get_first_last_authors(year):
     stat = {'first': {}, 'last': {}, 'any': {}}
     for which in ("first", "last", "any"):
         if which == 'any':
-            payload = [{"$match": {"jrc_publishing_date": {"$regex": "^"+ year},
+            payload = [{"$match": {"jrc_publishing_date": year_match(year),
                                    "jrc_author": {"$exists": True}}},
                        {"$group": {"_id": {"type": "$type", "subtype": "$subtype",
                                            "DataCite": "$types.resourceTypeGeneral"},
                                    "count": {"$sum": 1}}}
                       ]
         else:
-            payload = [{"$match": {"jrc_publishing_date": {"$regex": "^"+ year},
+            payload = [{"$match": {"jrc_publishing_date": year_match(year),
                                    f"jrc_{which}_author": {"$exists": True}}},
                        {"$group": {"_id": {"type": "$type", "subtype": "$subtype",
                                            "DataCite": "$types.resourceTypeGeneral"},
                                    "count": {"$sum": 1}}}
                       ]
-        try:
-            rows = DB['dis'].dois.aggregate(payload)
-        except Exception as err:
-            return render_template('error.html', urlroot=request.url_root,
-                                   title=render_warning("Could not get yearly metrics " \
-                                                        + "from dois collection"),
-                                   message=error_message(err))
+        with mongo_guard("Could not get yearly metrics from dois collection"):
+            rows = list(DB['dis'].dois.aggregate(payload))
         for row in rows:
             typ = row['_id']['type'] if 'type' in row['_id'] else "DataCite"
             sub = row['_id']['subtype'] if 'subtype' in row['_id'] else ""
@@ -876,7 +1117,7 @@ def get_no_relation(year=None):
               }
     if year:
         for pay in payload.values():
-            pay["jrc_publishing_date"] = {"$regex": "^"+ year}
+            pay["jrc_publishing_date"] = year_match(year)
     for key, val in payload.items():
         try:
             cnt = DB['dis'].dois.count_documents(val)
@@ -887,6 +1128,35 @@ def get_no_relation(year=None):
     return no_relation
 
 
+def get_preprint_chart_data(year='All'):
+    ''' Get preprint institution and capture method counts for the preprint charts
+        Keyword arguments:
+          year: year or "All"
+        Returns:
+          institution: dictionary of preprint counts by institution
+          capture: dictionary of preprint counts by capture method
+    '''
+    coll = DB['dis'].dois
+    match = {"type": "posted-content"}
+    payload = {"subtype": "preprint", "jrc_preprint": {"$exists": 1},
+               "relation.is-preprint-of": {"$exists": 0}}
+    if year != 'All':
+        match['jrc_publishing_date'] = payload['jrc_publishing_date'] = year_match(year)
+    institution = {}
+    for row in coll.aggregate([{"$match": match},
+                               {"$group": {"_id": {"institution": "$institution"},
+                                           "count": {"$sum": 1}}}]):
+        if not row['_id']['institution']:
+            institution['No institution'] = row['count']
+        else:
+            institution[row['_id']['institution'][0]['name']] = row['count']
+    fuzzy = coll.count_documents(payload)
+    del payload['relation.is-preprint-of']
+    capture = {'Fuzzy matching': fuzzy,
+               'Crossref relation': coll.count_documents(payload) - fuzzy}
+    return institution, capture
+
+
 def get_preprint_stats(rows):
     ''' Create a dictionary of preprint statistics
         Keyword arguments:
@@ -925,7 +1195,7 @@ def get_source_data(year):
     # Crossref
     if year != 'All':
         match = {"jrc_obtained_from": "Crossref",
-                 "jrc_publishing_date": {"$regex": "^"+ year}}
+                 "jrc_publishing_date": year_match(year)}
     else:
         match = {"jrc_obtained_from": "Crossref"}
     payload = [{"$match": match},
@@ -933,12 +1203,8 @@ def get_source_data(year):
                                    "subtype": "$subtype"},
                            "count": {"$sum": 1}}},
               ]
-    try:
-        rows = DB['dis'].dois.aggregate(payload)
-    except Exception as err:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not get Crossref types from dois"),
-                               message=error_message(err))
+    with mongo_guard("Could not get Crossref types from dois"):
+        rows = list(DB['dis'].dois.aggregate(payload))
     data = {"Crossref": 0, "DataCite": 0}
     hdict = {}
     for row in rows:
@@ -953,12 +1219,8 @@ def get_source_data(year):
     payload = [{"$match": match},
                {"$group": {"_id": "$types.resourceTypeGeneral","count": {"$sum": 1}}}
               ]
-    try:
-        rows = DB['dis'].dois.aggregate(payload)
-    except Exception as err:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not get DataCite types from dois"),
-                               message=error_message(err))
+    with mongo_guard("Could not get DataCite types from dois"):
+        rows = list(DB['dis'].dois.aggregate(payload))
     for row in rows:
         data['DataCite'] += row['count']
         hdict["_".join(['DataCite', row['_id'], ""])] = row['count']
@@ -976,7 +1238,7 @@ def s2_citation_count(doi, fmt='plain'):
     url = f"{app.config['S2_GRAPH']}paper/DOI:{doi}?fields=citationCount"
     headers = {'x-api-key': app.config['S2_API_KEY']}
     try:
-        resp = requests.get(url, headers=headers, timeout=10)
+        resp = SESSION.get(url, headers=headers, timeout=10)
         if resp.status_code == 429:
             raise Exception("Rate limit exceeded")
         if resp.status_code != 200:
@@ -1019,22 +1281,22 @@ def get_badges(auth):
           List of HTML badges
     '''
     badges = []
-    if 'in_database' in auth and auth['in_database']:
-        badges.append(f"{tiny_badge('success', 'In database')}")
+    if auth.get('in_database'):
+        badges.append(tiny_badge('success', 'In database'))
         if auth['alumni']:
-            badges.append(f"{tiny_badge('danger', 'Alumni')}")
-        elif 'validated' not in auth or not auth['validated']:
-            badges.append(f"{tiny_badge('warning', 'Not validated')}")
-        if 'orcid' not in auth or not auth['orcid']:
-            badges.append(f"{tiny_badge('urgent', 'No ORCID')}")
+            badges.append(tiny_badge('danger', 'Alumni'))
+        elif not auth.get('validated'):
+            badges.append(tiny_badge('warning', 'Not validated'))
+        if not auth.get('orcid'):
+            badges.append(tiny_badge('urgent', 'No ORCID'))
         if auth['asserted']:
-            badges.append(f"{tiny_badge('info', 'Janelia affiliation')}")
+            badges.append(tiny_badge('info', 'Janelia affiliation'))
         if 'duplicate_name' in auth:
-            badges.append(f"{tiny_badge('warning', 'Duplicate name')}")
+            badges.append(tiny_badge('warning', 'Duplicate name'))
     else:
-        badges.append(f"{tiny_badge('danger', 'Not in database')}")
-        if 'asserted' in auth and auth['asserted']:
-            badges.append(f"{tiny_badge('info', 'Janelia affiliation')}")
+        badges.append(tiny_badge('danger', 'Not in database'))
+        if auth.get('asserted'):
+            badges.append(tiny_badge('info', 'Janelia affiliation'))
     return badges
 
 
@@ -1053,19 +1315,16 @@ def show_tagged_authors(authors):
         if auth['janelian'] or auth['asserted']:
             count += 1
         who = f"{auth['given']} {auth['family']}"
-        if 'orcid' in auth and auth['orcid']:
-            who = f"<a href='/orcidui/{auth['orcid']}'>{who}</a>"
-        elif 'userIdO365' in auth and auth['userIdO365']:
-            who = f"<a href='/userui/{auth['userIdO365']}'>{who}</a>"
+        orcid, userid = auth.get('orcid'), auth.get('userIdO365')
+        if orcid:
+            who = f"<a href='/orcidui/{orcid}'>{who}</a>"
+        elif userid:
+            who = f"<a href='/userui/{userid}'>{who}</a>"
         badges = get_badges(auth)
-        tags = []
+        tags = set(auth.get('tags', []))
         if 'group' in auth:
-            tags.append(auth['group'])
-        if 'tags' in auth:
-            for tag in auth['tags']:
-                if tag not in tags:
-                    tags.append(tag)
-        tags.sort()
+            tags.add(auth['group'])
+        tags = sorted(tags)
         row = f"<td>{who}</td><td>{' '.join(badges)}</td><td>{', '.join(tags)}</td>"
         alist.append(row)
     return f"<table class='borderless'><tr>{'</tr><tr>'.join(alist)}</tr></table>", count
@@ -1082,8 +1341,8 @@ def add_orcid_badges(orc):
     badges.append(tiny_badge('success', 'In database'))
     if 'duplicate_name' in orc:
         badges.append(tiny_badge('warning', 'Duplicate name'))
-    if 'orcid' not in orc or not orc['orcid']:
-        badges.append(f"{tiny_badge('urgent', 'No ORCID')}")
+    if not orc.get('orcid'):
+        badges.append(tiny_badge('urgent', 'No ORCID'))
     if 'alumni' in orc:
         badges.append(tiny_badge('danger', 'Alumni'))
     if 'employeeId' not in orc:
@@ -1099,8 +1358,73 @@ def random_string(strlen=8):
         Keyword arguments:
           strlen: length of generated string
     '''
-    cmps = string.ascii_letters + string.digits
-    return ''.join(random.choice(cmps) for i in range(strlen))
+    return ''.join(random.choices(ALPHANUMERIC, k=strlen))
+
+
+def cached(key, func, ttl=600, keep=None):
+    ''' Return a cached value, calling a function to (re)generate it if it's missing or expired
+        Keyword arguments:
+          key: cache key
+          func: function that generates the value
+          ttl: time to live in seconds
+          keep: optional function that returns False for values that shouldn't be cached
+        Returns:
+          Cached value
+    '''
+    now = time()
+    entry = CACHE.get(key)
+    if entry and entry[0] > now:
+        return entry[1]
+    value = func()
+    if keep and not keep(value):
+        return value
+    with CACHE_LOCK:
+        if len(CACHE) >= CACHE_MAXSIZE:
+            for ckey in [ckey for ckey, val in CACHE.items() if val[0] <= now]:
+                del CACHE[ckey]
+            if len(CACHE) >= CACHE_MAXSIZE:
+                del CACHE[next(iter(CACHE))]
+        CACHE[key] = (now + ttl, value)
+    return value
+
+
+def get_supervisory_orgs(from_db=True):
+    ''' Get supervisory orgs (cached, since they rarely change)
+        Keyword arguments:
+          from_db: get orgs from the suporg collection instead of the People system
+        Returns:
+          Dictionary of supervisory orgs, ordered by name
+    '''
+    if from_db:
+        return cached('suporgs',
+                      lambda: dict(sorted(DL.get_supervisory_orgs(DB['dis'].suporg).items())))
+    return cached('suporgs_people', lambda: dict(sorted(DL.get_supervisory_orgs().items())))
+
+
+def get_tag_counts():
+    ''' Get DOI tag counts. The aggregation unwinds the tags of every tagged DOI, so the
+        result is cached and shared by the orgs and tag pages.
+        Keyword arguments:
+          None
+        Returns:
+          Dictionary of tag name: {tag type: count}
+    '''
+    def tag_counts():
+        ''' Count DOI tags by name and type
+        '''
+        payload = [{"$match": {"jrc_tag.name": {"$exists": True}}},
+                   {"$project": {"_id": 0, "jrc_tag": 1}},
+                   {"$unwind": "$jrc_tag"},
+                   {"$match": {"jrc_tag.name": {"$type": "string"}}},
+                   {"$group": {"_id": {"name": "$jrc_tag.name", "type": "$jrc_tag.type"},
+                               "count": {"$sum": 1}}},
+                   {"$sort": {"_id.type": 1}}]
+        counts = defaultdict(dict)
+        for row in DB['dis'].dois.aggregate(payload, allowDiskUse=True, batchSize=BATCH_SIZE):
+            counts[row['_id']['name']][row['_id'].get('type')] = row['count']
+        return dict(counts)
+
+    return cached('tag_counts', tag_counts, ttl=ROLLUP_TTL)
 
 
 def create_downloadable(name, header, content):
@@ -1113,9 +1437,14 @@ def create_downloadable(name, header, content):
           File name
     '''
     fname = f"{name}_{random_string()}_{datetime.today().strftime('%Y%m%d%H%M%S')}.tsv"
+    if header:
+        content = "\t".join(header) + "\n" + content
+    if len(content) <= DOWNLOAD_INLINE:
+        # Small files are embedded in the link, so they never touch the server again
+        href = "data:text/tab-separated-values;charset=utf-8," + quote(content)
+        return f'<a class="btn btn-outline-success" href="{href}" download="{fname}" ' \
+               + 'role="button">Download tab-delimited file</a>'
     with open(f"/tmp/{fname}", "w", encoding="utf8") as text_file:
-        if header:
-            content = "\t".join(header) + "\n" + content
         text_file.write(content)
     return f'<a class="btn btn-outline-success" href="/download/{fname}" ' \
                 + 'role="button">Download tab-delimited file</a>'
@@ -1130,12 +1459,17 @@ def humansize(num, suffix='B', places=2, space='disk'):
         Returns:
           string
     '''
-    limit = 1024.0 if space == 'disk' else 1000.0
-    for unit in ['', 'K', 'M', 'G', 'T']:
-        if abs(num) < limit:
-            return f"{num:.{places}f}{unit}{suffix}"
-        num /= limit
-    return "{num:.1f}P{suffix}"
+    limit = 1024 if space == 'disk' else 1000
+    exp = min(int(math.log(abs(num), limit)), 5) if abs(num) >= limit else 0
+    # Correct for floating-point error in log() at unit boundaries
+    if exp < 5 and abs(num) >= limit ** (exp + 1):
+        exp += 1
+    elif exp and abs(num) < limit ** exp:
+        exp -= 1
+    num /= limit ** exp
+    if exp == 5:
+        return f"{num:.1f}P{suffix}"
+    return f"{num:.{places}f}{['', 'K', 'M', 'G', 'T'][exp]}{suffix}"
 
 
 def dloop(row, keys, sep="\t"):
@@ -1183,7 +1517,7 @@ def year_pulldown(prefix, all_years=True):
           Pulldown HTML
     '''
     years = ['All'] if all_years else []
-    for year in range(datetime.now().year, 2005, -1):
+    for year in range(datetime.now().year, FIRST_YEAR - 1, -1):
         years.append(str(year))
     html = "<div class='btn-group'><button type='button' class='btn btn-info dropdown-toggle' " \
            + "data-toggle='dropdown' aria-haspopup='true' aria-expanded='false'>" \
@@ -1202,13 +1536,20 @@ def year_pulldown(prefix, all_years=True):
 def get_doc_json():
     ''' Show documentation
     '''
-    try:
+    def build_swag():
+        ''' Parse the endpoint docstrings into an encoded swagger spec
+        '''
         swag = swagger(app)
+        swag['info']['version'] = __version__
+        swag['info']['title'] = "Data and Information Services"
+        return encode_json(swag)
+
+    # The spec only changes when the code does, so it's parsed once per day at most
+    try:
+        swag = cached('swagger', build_swag, ttl=86400)
     except Exception as err:
         return inspect_error(err, 'Could not parse swag')
-    swag['info']['version'] = __version__
-    swag['info']['title'] = "Data and Information Services"
-    return jsonify(swag)
+    return app.response_class(swag, mimetype='application/json')
 
 
 @app.route('/help')
@@ -1237,7 +1578,7 @@ def stats():
     '''
     tbt = time() - app.config['LAST_TRANSACTION']
     result = initialize_result()
-    start = datetime.fromtimestamp(app.config['START_TIME']).strftime('%Y-%m-%d %H:%M:%S')
+    start = datetime.fromtimestamp(g.start_time).strftime('%Y-%m-%d %H:%M:%S')
     up_time = datetime.now() - app.config['STARTDT']
     result['stats'] = {"version": __version__,
                        "requests": app.config['COUNTER'],
@@ -1247,10 +1588,35 @@ def stats():
                        "pid": os.getpid(),
                        "endpoint_counts": app.config['ENDPOINTS'],
                        "time_since_last_transaction": tbt,
+                       "cached_results": len(CACHE),
                       }
     return generate_response(result)
 
 
+@app.route("/cache/clear", methods=['OPTIONS', 'POST'])
+def clear_cache():
+    '''
+    Clear cached results
+    Clear cached query results (DOI rollups, supervisory orgs, ORCID and DOI records) for
+    this worker. Only available to local callers.
+    ---
+    tags:
+      - Diagnostics
+    responses:
+      200:
+        description: Cache cleared
+      403:
+        description: Caller is not local
+    '''
+    result = initialize_result()
+    if request.remote_addr not in ('127.0.0.1', '::1'):
+        raise InvalidUsage("The cache can only be cleared from the server itself", 403)
+    with CACHE_LOCK:
+        result['rest']['row_count'] = len(CACHE)
+        CACHE.clear()
+    return generate_response(result)
+
+
 # ******************************************************************************
 # * API endpoints (DOI)                                                        *
 # ******************************************************************************
@@ -1275,7 +1641,7 @@ def show_doi_authors(doi):
       500:
         description: MongoDB error
     '''
-    doi = doi.lstrip('/').rstrip('/').lower()
+    doi = normalize_doi(doi)
     result = initialize_result()
     try:
         row = DB['dis'].dois.find_one({"doi": doi}, {'_id': 0})
@@ -1288,10 +1654,10 @@ def show_doi_authors(doi):
         authors = DL.get_author_details(row, DB['dis'].orcid)
     except Exception as err:
         raise InvalidUsage(str(err), 500) from err
-    tagname = []
+    tagname = set()
     tags = []
     try:
-        orgs = DL.get_supervisory_orgs(DB['dis'].suporg)
+        orgs = get_supervisory_orgs()
     except Exception as err:
         raise InvalidUsage("Could not get supervisory orgs: " + str(err), 500) from err
     if 'jrc_tag' in row:
@@ -1303,7 +1669,7 @@ def show_doi_authors(doi):
                 else:
                     code = None
                     tagtype = None
-                tagname.append(atag['name'])
+                tagname.add(atag['name'])
                 tags.append({"name": atag['name'], "code": code, "type": tagtype})
     if tags:
         result['tags'] = tags
@@ -1336,17 +1702,13 @@ def show_doi_janelians(doi):
     resp = show_doi_authors(doi)
     data = resp.json
     result['data'] = []
-    tags = []
+    tags = set()
     for auth in data['data']:
         if auth['janelian']:
             result['data'].append(auth)
-            if 'tags' in auth:
-                for atag in auth['tags']:
-                    if atag not in tags:
-                        tags.append(atag)
+            tags.update(auth.get('tags', []))
     if tags:
-        tags.sort()
-        result['tags'] = tags
+        result['tags'] = sorted(tags)
     return generate_response(result)
 
 
@@ -1371,7 +1733,7 @@ def show_doi_migration(doi):
       500:
         description: MongoDB error
     '''
-    doi = doi.lstrip('/').rstrip('/').lower()
+    doi = normalize_doi(doi)
     result = initialize_result()
     try:
         row = DB['dis'].dois.find_one({"doi": doi}, {'_id': 0})
@@ -1418,23 +1780,22 @@ def show_doi_migrations(idate):
     except Exception as err:
         raise InvalidUsage(str(err), 400) from err
     try:
-        rows = DB['dis'].dois.find({"jrc_author": {"$exists": True},
-                                    "jrc_inserted": {"$gte" : isodate}}, {'_id': 0})
+        rows = start_cursor(DB['dis'].dois.find({"jrc_author": {"$exists": True},
+                                                 "jrc_inserted": {"$gte" : isodate}},
+                                                {'_id': 0}).batch_size(BATCH_SIZE))
     except Exception as err:
         raise InvalidUsage(str(err), 500) from err
-    result['rest']['row_count'] = 0
     result['rest']['source'] = 'mongo'
-    result['data'] = []
-    for row in rows:
-        try:
-            doi = row['doi']
+
+    def records():
+        ''' Yield migration records as the cursor is read
+        '''
+        for row in rows:
             rec = get_migration_data(row)
-            rec['doi'] = doi
-            result['data'].append(rec)
-        except Exception as err:
-            raise InvalidUsage(str(err), 500) from err
-    result['rest']['row_count'] = len(result['data'])
-    return generate_response(result)
+            rec['doi'] = row['doi']
+            yield rec
+
+    return generate_stream_response(result, records())
 
 
 @app.route('/doi/<path:doi>')
@@ -1459,7 +1820,7 @@ def show_doi(doi):
       500:
         description: MongoDB error
     '''
-    doi = doi.lstrip('/').rstrip('/').lower()
+    doi = normalize_doi(doi)
     result = initialize_result()
     try:
         row = DB['dis'].dois.find_one({"doi": doi}, {'_id': 0})
@@ -1505,16 +1866,12 @@ def show_inserted(idate):
     except Exception as err:
         raise InvalidUsage(str(err), 400) from err
     try:
-        rows = DB['dis'].dois.find({"jrc_inserted": {"$gte" : isodate}}, {'_id': 0})
+        rows = start_cursor(DB['dis'].dois.find({"jrc_inserted": {"$gte" : isodate}},
+                                                {'_id': 0}).batch_size(BATCH_SIZE))
     except Exception as err:
         raise InvalidUsage(str(err), 500) from err
-    result['rest']['row_count'] = 0
     result['rest']['source'] = 'mongo'
-    result['data'] = []
-    for row in rows:
-        result['data'].append(row)
-        result['rest']['row_count'] += 1
-    return generate_response(result)
+    return generate_stream_response(result, rows)
 
 
 @app.route('/citation/<path:doi>')
@@ -1541,10 +1898,10 @@ def show_citation(doi):
       500:
         description: MongoDB or formatting error
     '''
-    doi = doi.lstrip('/').rstrip('/').lower()
+    doi = normalize_doi(doi)
     result = initialize_result()
     try:
-        row = DB['dis'].dois.find_one({"doi": doi}, {'_id': 0})
+        row = DB['dis'].dois.find_one({"doi": doi}, CITATION_EXCLUDE)
     except Exception as err:
         raise InvalidUsage(str(err), 500) from err
     if not row:
@@ -1593,11 +1950,15 @@ def show_multiple_citations(ctype='dis'):
         raise InvalidUsage("You must specify a list of DOIs")
     result['rest']['source'] = 'mongo'
     result['data'] = {}
-    for doi in ipd['dois']:
-        try:
-            row = DB['dis'].dois.find_one({"doi": doi.tolower()}, {'_id': 0})
-        except Exception as err:
-            raise InvalidUsage(str(err), 500) from err
+    # Normalize each DOI once, the same way the single-DOI endpoints do
+    dois = {doi: normalize_doi(doi) for doi in ipd['dois']}
+    try:
+        rows = DB['dis'].dois.find({"doi": {"$in": list(dois.values())}}, CITATION_EXCLUDE)
+        found = {row['doi']: row for row in rows}
+    except Exception as err:
+        raise InvalidUsage(str(err), 500) from err
+    for doi, ldoi in dois.items():
+        row = found.get(ldoi)
         if not row:
             result['data'][doi] = ''
             continue
@@ -1636,10 +1997,10 @@ def show_flylight_citation(doi):
       500:
         description: MongoDB or formatting error
     '''
-    doi = doi.lstrip('/').rstrip('/').lower()
+    doi = normalize_doi(doi)
     result = initialize_result()
     try:
-        row = DB['dis'].dois.find_one({"doi": doi}, {'_id': 0})
+        row = DB['dis'].dois.find_one({"doi": doi}, CITATION_EXCLUDE)
     except Exception as err:
         raise InvalidUsage(str(err), 500) from err
     if not row:
@@ -1678,10 +2039,10 @@ def show_full_citation(doi):
       500:
         description: MongoDB or formatting error
     '''
-    doi = doi.lstrip('/').rstrip('/').lower()
+    doi = normalize_doi(doi)
     result = initialize_result()
     try:
-        row = DB['dis'].dois.find_one({"doi": doi}, {'_id': 0})
+        row = DB['dis'].dois.find_one({"doi": doi}, CITATION_EXCLUDE)
     except Exception as err:
         raise InvalidUsage(str(err), 500) from err
     if not row:
@@ -1720,23 +2081,17 @@ def show_components(doi):
       500:
         description: MongoDB or formatting error
     '''
-    doi = doi.lstrip('/').rstrip('/').lower()
+    doi = normalize_doi(doi)
     result = initialize_result()
     try:
-        row = DB['dis'].dois.find_one({"doi": doi}, {'_id': 0})
+        row = DB['dis'].dois.find_one({"doi": doi}, CITATION_EXCLUDE)
     except Exception as err:
         raise InvalidUsage(str(err), 500) from err
     if not row:
         raise InvalidUsage(f"DOI {doi} is not in the database", 404)
     result['rest']['row_count'] = 1
     result['rest']['source'] = 'mongo'
-    result['data'] = {"authors": DL.get_author_list(row, returntype="list"),
-                      "journal": DL.get_journal(row),
-                      "publishing_date": DL.get_publishing_date(row),
-                      "title": DL.get_title(row)
-                     }
-    if row['jrc_obtained_from'] == 'Crossref' and 'abstract' in row:
-        result['data']['abstract'] = row['abstract']
+    result['data'] = get_citation_components(row)
     return generate_response(result)
 
 
@@ -1767,18 +2122,12 @@ def show_dois_custom():
         raise InvalidUsage("You must specify a custom query")
     result['rest']['source'] = 'mongo'
     result['rest']['query'] = ipd['query']
-    result['data'] = []
-    print(ipd['query'])
     try:
-        rows = DB['dis'].dois.find(ipd['query'], {'_id': 0})
+        rows = start_cursor(DB['dis'].dois.find(ipd['query'],
+                                                {'_id': 0}).batch_size(BATCH_SIZE))
     except Exception as err:
         raise InvalidUsage(str(err), 500) from err
-    if not rows:
-        generate_response(result)
-    for row in rows:
-        result['data'].append(row)
-        result['rest']['row_count'] += 1
-    return generate_response(result)
+    return generate_stream_response(result, rows)
 
 
 @app.route('/components', defaults={'ctype': 'dis'}, methods=['OPTIONS', 'POST'])
@@ -1814,24 +2163,13 @@ def show_multiple_components(ctype='dis'):
     if "tag" not in ipd or not (ipd['tag']) or not isinstance(ipd['tag'], str):
         raise InvalidUsage("You must specify a tag")
     result['rest']['source'] = 'mongo'
-    result['data'] = []
     try:
-        rows = DB['dis'].dois.find({"jrc_tag.name": ipd['tag']}, {'_id': 0})
+        rows = DB['dis'].dois.find({"jrc_tag.name": ipd['tag']}, CITATION_EXCLUDE)
+        result['data'] = [{"doi": row['doi'], **get_citation_components(row, ctype)}
+                          for row in rows]
     except Exception as err:
         raise InvalidUsage(str(err), 500) from err
-    if not rows:
-        generate_response(result)
-    for row in rows:
-        record = {"doi": row['doi'],
-                  "authors": DL.get_author_list(row, style=ctype, returntype="list"),
-                  "title": DL.get_title(row),
-                  "journal": DL.get_journal(row),
-                  "publishing_date": DL.get_publishing_date(row)
-                 }
-        if row['jrc_obtained_from'] == 'Crossref' and 'abstract' in row:
-            record['abstract'] = row['abstract']
-        result['data'].append(record)
-        result['rest']['row_count'] += 1
+    result['rest']['row_count'] = len(result['data'])
     return generate_response(result)
 
 
@@ -1852,7 +2190,7 @@ def show_types():
     result = initialize_result()
     payload = [{"$group": {"_id": {"type": "$type", "subtype": "$subtype"},"count": {"$sum": 1}}}]
     try:
-        rows = DB['dis'].dois.aggregate(payload)
+        rows = cached('types', lambda: list(DB['dis'].dois.aggregate(payload)), ttl=ROLLUP_TTL)
     except Exception as err:
         raise InvalidUsage(str(err), 500) from err
     result['rest']['source'] = 'mongo'
@@ -1890,11 +2228,11 @@ def set_jrc_author(doi):
       500:
         description: MongoDB or formatting error
     '''
-    doi = doi.lstrip('/').rstrip('/').lower()
+    doi = normalize_doi(doi)
     result = initialize_result()
     result['data'] = []
     try:
-        row = DB['dis'].dois.find_one({"doi": doi}, {'_id': 0})
+        row = DB['dis'].dois.find_one({"doi": doi}, CITATION_EXCLUDE)
     except Exception as err:
         raise InvalidUsage(str(err), 500) from err
     if not row:
@@ -1904,10 +2242,8 @@ def set_jrc_author(doi):
         authors = DL.get_author_details(row, DB['dis'].orcid)
     except Exception as err:
         raise InvalidUsage(str(err), 500) from err
-    jrc_author = []
-    for auth in authors:
-        if auth['janelian'] and 'employeeId' in auth and auth['employeeId']:
-            jrc_author.append(auth['employeeId'])
+    jrc_author = [auth['employeeId'] for auth in authors
+                  if auth['janelian'] and auth.get('employeeId')]
     if not jrc_author:
         return generate_response(result)
     payload = {"$set": {"jrc_author": jrc_author}}
@@ -1941,13 +2277,11 @@ def show_oids():
     '''
     result = initialize_result()
     try:
-        rows = DB['dis'].orcid.find({}, {'_id': 0}).collation({"locale": "en"}).sort("family", 1)
+        result['data'] = list(DB['dis'].orcid.find({}, {'_id': 0}).collation({"locale": "en"})
+                              .sort("family", 1).batch_size(BATCH_SIZE))
     except Exception as err:
         raise InvalidUsage(str(err), 500) from err
     result['rest']['source'] = 'mongo'
-    result['data'] = []
-    for row in rows:
-        result['data'].append(row)
     result['rest']['row_count'] = len(result['data'])
     return generate_response(result)
 
@@ -1974,20 +2308,19 @@ def show_oid(oid):
         description: MongoDB error
     '''
     result = initialize_result()
-    if re.match(r'([0-9A-Z]{4}-){3}[0-9A-Z]+', oid):
+    if ORCID_REGEX.match(oid):
         payload = {"orcid": oid}
     else:
-        payload = {"$or": [{"family": {"$regex": oid, "$options" : "i"}},
-                           {"given": {"$regex": oid, "$options" : "i"}}]
+        rex = re.escape(oid)
+        payload = {"$or": [{"family": {"$regex": rex, "$options" : "i"}},
+                           {"given": {"$regex": rex, "$options" : "i"}}]
                   }
     try:
-        rows = DB['dis'].orcid.find(payload, {'_id': 0})
+        result['data'] = list(DB['dis'].orcid.find(payload, {'_id': 0}))
     except Exception as err:
         raise InvalidUsage(str(err), 500) from err
     result['rest']['source'] = 'mongo'
-    result['data'] = []
-    for row in rows:
-        result['data'].append(row)
+    result['rest']['row_count'] = len(result['data'])
     return generate_response(result)
 
 
@@ -2011,10 +2344,8 @@ def show_oidapi(oid):
         description: ORCID data
     '''
     result = initialize_result()
-    url = f"{app.config['ORCID']}{oid}"
     try:
-        resp = requests.get(url, headers={"Accept": "application/json"}, timeout=10)
-        result['data'] = resp.json()
+        result['data'] = get_orcid_record(oid)
     except Exception as err:
         raise InvalidUsage(str(err), 500) from err
     if 'error-code' not in result['data']:
@@ -2048,7 +2379,7 @@ def show_home():
     journals += '</option>'
     return make_response(render_template('home.html', urlroot=request.url_root,
                                          journals=journals,
-                                         navbar=generate_navbar('Home')))
+                                         navbar=NAVBARS['Home']))
 
 # ******************************************************************************
 # * UI endpoints (DOI)                                                         *
@@ -2058,18 +2389,21 @@ def show_doi_ui(doi):
     ''' Show DOI
     '''
     # pylint: disable=too-many-return-statements
-    doi = doi.lstrip('/').rstrip('/').lower()
+    doi = normalize_doi(doi)
     try:
-        row = DB['dis'].dois.find_one({"doi": doi})
+        # Relations are kept for add_relations
+        row = DB['dis'].dois.find_one({"doi": doi}, {"_id": 0, "funder": 0, "license": 0,
+                                                     "link": 0, "reference": 0})
     except Exception as err:
         return inspect_error(err, 'Could not get DOI')
     if row:
         html = '<h5 style="color:lime">This DOI is saved locally in the Janelia database</h5>'
         html += add_jrc_fields(row)
+        data = row
     else:
         html = '<h5 style="color:red">This DOI is not saved locally in the ' \
                + 'Janelia database</h5><br>'
-    _, data = get_doi(doi)
+        _, data = get_doi(doi)
     if not data:
         return render_template('warning.html', urlroot=request.url_root,
                                 title=render_warning("Could not find DOI", 'warning'),
@@ -2090,10 +2424,17 @@ def show_doi_ui(doi):
         return render_template('error.html', urlroot=request.url_root,
                                 title=render_warning("Could not find journal"),
                                 message=f"Could not find journal for {doi}")
+    # The OA, citation count and author detail lookups are independent, so run them together
+    cfuture = afuture = None
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        ofuture = executor.submit(JRC.call_oa, doi)
+        if row:
+            cfuture = executor.submit(s2_citation_count, doi, fmt='html')
+            afuture = executor.submit(DL.get_author_details, row, DB['dis'].orcid)
     link = f"<a href='https://dx.doi.org/{doi}' target='_blank'>{doi}</a>"
     rlink = f"/doi/{doi}"
     mlink = f"/doi/migration/{doi}"
-    oresp = JRC.call_oa(doi)
+    oresp = ofuture.result()
     obutton = ""
     if oresp:
         olink = f"{app.config['OA']}{doi}"
@@ -2109,14 +2450,14 @@ def show_doi_ui(doi):
     html += f"<span class='paperdata'>DOI: {link} {tiny_badge('primary', 'Raw data', rlink)}" \
             + f" {tiny_badge('primary', 'HQ migration', mlink)} {obutton}</span><br>"
     if row:
-        citations = s2_citation_count(doi, fmt='html')
+        citations = cfuture.result()
         if citations:
             html += f"<span class='paperdata'>Citations: {citations}</span><br>"
     html += "<br>"
     html += add_relations(data)
     if row:
         try:
-            authors = DL.get_author_details(row, DB['dis'].orcid)
+            authors = afuture.result()
         except Exception as err:
             return inspect_error(err, 'Could not get author list details')
         if authors:
@@ -2126,16 +2467,17 @@ def show_doi_ui(doi):
                         + f"<div class='scroll'>{''.join(alist)}</div>"
     return make_response(render_template('general.html', urlroot=request.url_root,
                                          title=doi, html=html,
-                                         navbar=generate_navbar('DOIs')))
+                                         navbar=NAVBARS['DOIs']))
 
 
 @app.route('/doisui_name/<string:name>')
 def show_doi_by_name_ui(name):
     ''' Show DOIs for a family name
     '''
-    payload = {'$or': [{"author.family": {"$regex": f"^{name}$", "$options" : "i"}},
-                       {"creators.familyName": {"$regex": f"^{name}$", "$options" : "i"}},
-                       {"creators.name": {"$regex": f"{name}$", "$options" : "i"}},
+    rex = re.escape(name)
+    payload = {'$or': [{"author.family": {"$regex": f"^{rex}$", "$options" : "i"}},
+                       {"creators.familyName": {"$regex": f"^{rex}$", "$options" : "i"}},
+                       {"creators.name": {"$regex": f"{rex}$", "$options" : "i"}},
                       ]}
     try:
         rows = DB['dis'].dois.find(payload).collation({"locale": "en"}).sort("doi", 1)
@@ -2150,7 +2492,7 @@ def show_doi_by_name_ui(name):
                                message=f"Could not find any DOIs with author name matching {name}")
     return make_response(render_template('general.html', urlroot=request.url_root,
                                          title=f"DOIs for {name}", html=html,
-                                         navbar=generate_navbar('DOIs')))
+                                         navbar=NAVBARS['DOIs']))
 
 
 @app.route('/doisui_type/<string:src>/<string:typ>/<string:sub>', defaults={'year': 'All'})
@@ -2163,7 +2505,7 @@ def show_doi_by_type_ui(src, typ, sub, year):
     if sub != 'None':
         payload["subtype"] = sub
     if year != 'All':
-        payload['jrc_publishing_date'] = {"$regex": "^" + year}
+        payload['jrc_publishing_date'] = year_match(year)
     try:
         rows = DB['dis'].dois.find(payload).collation({"locale": "en"}).sort("doi", 1)
     except Exception as err:
@@ -2183,15 +2525,16 @@ def show_doi_by_type_ui(src, typ, sub, year):
                                        + desc)
     return make_response(render_template('general.html', urlroot=request.url_root,
                                          title=f"DOIs for {desc}", html=html,
-                                         navbar=generate_navbar('DOIs')))
+                                         navbar=NAVBARS['DOIs']))
 
 
 @app.route('/titlesui/<string:title>')
 def show_doi_by_title_ui(title):
     ''' Show DOIs for a given title
     '''
+    rex = re.escape(title)
     payload = ([{"$unwind" : "$title"},
-                {"$match": {"title": {"$regex": title, "$options" : "i"},
+                {"$match": {"title": {"$regex": rex, "$options" : "i"},
                         }}
                ])
     try:
@@ -2203,7 +2546,7 @@ def show_doi_by_title_ui(title):
     union = []
     for row in rows:
         union.append(row)
-    payload = {"titles.title": {"$regex": title, "$options" : "i"}}
+    payload = {"titles.title": {"$regex": rex, "$options" : "i"}}
     try:
         rows = DB['dis'].dois.find(payload)
     except Exception as err:
@@ -2219,7 +2562,7 @@ def show_doi_by_title_ui(title):
                                message=f"Could not find any DOIs with title matching {title}")
     return make_response(render_template('general.html', urlroot=request.url_root,
                                          title=f"DOIs for {title}", html=html,
-                                         navbar=generate_navbar('DOIs')))
+                                         navbar=NAVBARS['DOIs']))
 
 
 @app.route('/dois_author/<string:year>')
@@ -2241,15 +2584,10 @@ def dois_author(year='All'):
                                {"jrc_last_author": {"$exists": True}},
                                {"jrc_author": {"$exists": True}}]}
         if year != 'All':
-            payload['jrc_publishing_date'] = {"$regex": "^"+ year}
-        try:
+            payload['jrc_publishing_date'] = year_match(year)
+        with mongo_guard("Could not get authorship from dois collection"):
             cnt = DB['dis'].dois.count_documents(payload)
             source[src] = cnt
-        except Exception as err:
-            return render_template('error.html', urlroot=request.url_root,
-                                   title=render_warning("Could not get authorship " \
-                                                        + "from dois collection"),
-                                   message=error_message(err))
     html = '<table id="authors" class="tablesorter numbers"><thead><tr>' \
            + '<th>Authorship</th><th>Crossref</th><th>DataCite</th>' \
            + '</tr></thead><tbody>'
@@ -2297,7 +2635,7 @@ def dois_author(year='All'):
     return make_response(render_template('bokeh.html', urlroot=request.url_root,
                                          title=title, html=html,
                                          chartscript=chartscript, chartdiv=chartdiv,
-                                         navbar=generate_navbar('Authorship')))
+                                         navbar=NAVBARS['Authorship']))
 
 
 @app.route('/doiui_group/<string:year>')
@@ -2306,47 +2644,24 @@ def doiui_group(year='All'):
     ''' Show group leader first/last authorship
     '''
     payload = {"group_code": {"$exists": True}}
-    try:
-        rows = DB['dis'].orcid.find(payload, {"employeeId": 1})
-    except Exception as err:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not get group leads " \
-                                                    + "from dois collection"),
-                               message=error_message(err))
-    leads = []
-    for row in rows:
-        leads.append(row['employeeId'])
+    with mongo_guard("Could not get group leads from dois collection"):
+        leads = [row['employeeId'] for row in DB['dis'].orcid.find(payload, {"employeeId": 1})]
     payload = {"jrc_first_id": {"$in": leads}}
     if year != 'All':
-        payload['jrc_publishing_date'] = {"$regex": "^"+ year}
+        payload['jrc_publishing_date'] = year_match(year)
     cnt = {}
-    try:
+    with mongo_guard("Could not get first authors from dois collection"):
         cnt['first'] = DB['dis'].dois.count_documents(payload)
-    except Exception as err:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not get first authors " \
-                                                    + "from dois collection"),
-                               message=error_message(err))
     payload = {"jrc_last_id": {"$in": leads}}
     if year != 'All':
-        payload['jrc_publishing_date'] = {"$regex": "^"+ year}
-    try:
+        payload['jrc_publishing_date'] = year_match(year)
+    with mongo_guard("Could not get last authors from dois collection"):
         cnt['last'] = DB['dis'].dois.count_documents(payload)
-    except Exception as err:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not get last authors " \
-                                                    + "from dois collection"),
-                               message=error_message(err))
     payload = {"jrc_author": {"$exists": True}}
     if year != 'All':
-        payload['jrc_publishing_date'] = {"$regex": "^"+ year}
-    try:
+        payload['jrc_publishing_date'] = year_match(year)
+    with mongo_guard("Could not get last authors from dois collection"):
         cnt['total'] = DB['dis'].dois.count_documents(payload)
-    except Exception as err:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not get last authors " \
-                                                    + "from dois collection"),
-                               message=error_message(err))
     html = "<table id='group' class='tablesorter numbers'><thead></thead><tbody>"
     html += f"<tr><td>Lab head first author</td><td>{cnt['first']:,}</td></tr>"
     html += f"<tr><td>Lab head last author</td><td>{cnt['last']:,}</td></tr>"
@@ -2375,7 +2690,7 @@ def doiui_group(year='All'):
     return make_response(render_template('bokeh.html', urlroot=request.url_root,
                                          title=title, html=html,
                                          chartscript=chartscript, chartdiv=chartdiv,
-                                         navbar=generate_navbar('Authorship')))
+                                         navbar=NAVBARS['Authorship']))
 
 
 def get_top_journals(year):
@@ -2383,7 +2698,7 @@ def get_top_journals(year):
     '''
     match = {"container-title": {"$exists": True, "$ne" : ""}}
     if year != 'All':
-        match["jrc_publishing_date"] = {"$regex": "^"+ year}
+        match["jrc_publishing_date"] = year_match(year)
     payload = [{"$unwind" : "$container-title"},
                {"$match": match},
                {"$group": {"_id": "$container-title", "count":{"$sum": 1}}},
@@ -2415,12 +2730,8 @@ def dois_journal(year='All', top=10):
     ''' Show journals
     '''
     top = min(top, 20)
-    try:
+    with mongo_guard("Could not get journal data from dois"):
         journal = get_top_journals(year)
-    except Exception as err:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not get journal data from dois"),
-                               message=error_message(err))
     html = '<table id="journals" class="tablesorter numberlast"><thead><tr>' \
            + '<th>Journal</th><th>Count</th></tr></thead><tbody>'
     data = {}
@@ -2442,7 +2753,7 @@ def dois_journal(year='All', top=10):
     return make_response(render_template('bokeh.html', urlroot=request.url_root,
                                          title=title, html=html,
                                          chartscript=chartscript, chartdiv=chartdiv,
-                                         navbar=generate_navbar('DOIs')))
+                                         navbar=NAVBARS['DOIs']))
 
 
 @app.route('/dois_source/<string:year>')
@@ -2450,16 +2761,12 @@ def dois_journal(year='All', top=10):
 def dois_source(year='All'):
     ''' Show data sources
     '''
-    try:
+    with mongo_guard("Could not get source data from dois"):
         data, hdict = get_source_data(year)
-    except Exception as err:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not get source data from dois"),
-                               message=error_message(err))
     # HTML and charts
-    html = '<table id="types" class="tablesorter numberlast"><thead><tr>' \
-           + '<th>Source</th><th>Type</th><th>Subtype</th><th>Count</th>' \
-           + '</tr></thead><tbody>'
+    html = ['<table id="types" class="tablesorter numberlast"><thead><tr>' \
+            + '<th>Source</th><th>Type</th><th>Subtype</th><th>Count</th>' \
+            + '</tr></thead><tbody>']
     for key, val in sorted(hdict.items(), key=itemgetter(1), reverse=True):
         src, typ, sub = key.split('_')
         if not sub:
@@ -2468,9 +2775,10 @@ def dois_source(year='All'):
             val = f"<a href='/doisui_type/{src}/{typ}/{sub}'>{val}</a>"
         else:
             val = f"<a href='/doisui_type/{src}/{typ}/{sub}/{year}'>{val}</a>"
-        html += f"<tr><td>{src}</td><td>{typ}</td><td>{sub if sub != 'None' else ''}</td>" \
-                + f"<td>{val}</td></tr>"
-    html += '</tbody></table><br>' + year_pulldown('dois_source')
+        html.append(f"<tr><td>{src}</td><td>{typ}</td><td>{sub if sub != 'None' else ''}</td>" \
+                    + f"<td>{val}</td></tr>")
+    html.append('</tbody></table><br>' + year_pulldown('dois_source'))
+    html = ''.join(html)
     title = "DOIs by source"
     if year != 'All':
         title += f" ({year})"
@@ -2481,13 +2789,8 @@ def dois_source(year='All'):
                    {"$group": {"_id": "$jrc_load_source", "count": {"$sum": 1}}},
                    {"$sort" : {"count": -1}}
                   ]
-        try:
-            rows = DB['dis'].dois.aggregate(payload)
-        except Exception as err:
-            return render_template('error.html', urlroot=request.url_root,
-                                   title=render_warning("Could not get load methods " \
-                                                        + "from dois collection"),
-                                   message=error_message(err))
+        with mongo_guard("Could not get load methods from dois collection"):
+            rows = list(DB['dis'].dois.aggregate(payload))
         data = {}
         for row in rows:
             data[row['_id']] = row['count']
@@ -2504,7 +2807,7 @@ def dois_source(year='All'):
     return make_response(render_template('bokeh.html', urlroot=request.url_root,
                                          title=title, html=html,
                                          chartscript=chartscript, chartdiv=chartdiv,
-                                         navbar=generate_navbar('DOIs')))
+                                         navbar=NAVBARS['DOIs']))
 
 
 @app.route('/dois_preprint/<string:year>')
@@ -2516,31 +2819,21 @@ def dois_preprint(year='All'):
     for src in app.config['SOURCES']:
         payload = {"jrc_obtained_from": src, "jrc_preprint": {"$exists": False}}
         if year != 'All':
-            payload['jrc_publishing_date'] = {"$regex": "^"+ year}
+            payload['jrc_publishing_date'] = year_match(year)
         if src == 'Crossref':
             payload['type'] = {"$in": ["journal-article", "posted-content"]}
         else:
             payload['type'] = {"types.resourceTypeGeneral": "Preprint"}
-        try:
+        with mongo_guard("Could not get source counts from dois collection"):
             cnt = DB['dis'].dois.count_documents(payload)
             source[src] = cnt
-        except Exception as err:
-            return render_template('error.html', urlroot=request.url_root,
-                                   title=render_warning("Could not get source counts " \
-                                                        + "from dois collection"),
-                                   message=error_message(err))
     match = {"jrc_preprint": {"$exists": True}}
     if year != 'All':
-        match['jrc_publishing_date'] = {"$regex": "^"+ year}
+        match['jrc_publishing_date'] = year_match(year)
     payload = [{"$match": match},
                {"$group": {"_id": {"type": "$type", "preprint": "$preprint"},"count": {"$sum": 1}}}]
-    try:
-        rows = DB['dis'].dois.aggregate(payload)
-    except Exception as err:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not get preprint counts " \
-                                                    + "from dois collection"),
-                               message=error_message(err))
+    with mongo_guard("Could not get preprint counts from dois collection"):
+        rows = list(DB['dis'].dois.aggregate(payload))
     data, preprint = compute_preprint_data(rows)
     no_relation = get_no_relation()
     html = '<table id="preprints" class="tablesorter numbers"><thead><tr>' \
@@ -2558,53 +2851,40 @@ def dois_preprint(year='All'):
             + f"<td>{no_relation['DataCite']['preprint']:,}</td></tr>"
     html += '</tbody></table><br>' + year_pulldown('dois_preprint')
     data['No preprint relation'] = source['Crossref'] + source['DataCite']
-    try:
-        chartscript, chartdiv = DP.preprint_pie_charts(data, year, DB['dis'].dois)
-    except Exception as err:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not generate preprint pie charts"),
-                               message=error_message(err))
+    with mongo_guard("Could not get preprint chart data from dois collection"):
+        institution, capture = get_preprint_chart_data(year)
+    chartscript, chartdiv = DP.preprint_pie_charts(data, year, institution, capture)
     title = "DOI preprint status"
     if year != 'All':
         title += f" ({year})"
     return make_response(render_template('bokeh.html', urlroot=request.url_root,
                                          title=title, html=html,
                                          chartscript=chartscript, chartdiv=chartdiv,
-                                         navbar=generate_navbar('Preprints')))
+                                         navbar=NAVBARS['Preprints']))
 
 
 @app.route('/dois_preprint_year')
 def dois_preprint_year():
     ''' Show preprints by year
     '''
-    payload = [{"$group": {"_id": {"year": {"$substrBytes": ["$jrc_publishing_date", 0, 4]},
+    payload = [{"$match": {"jrc_publishing_date": {"$gte": str(FIRST_YEAR)}}},
+               {"$group": {"_id": {"year": {"$substrBytes": ["$jrc_publishing_date", 0, 4]},
                                    "type": "$type", "sub": "$subtype",
                                   },
                            "count": {"$sum": 1}}},
                {"$sort": {"_id.year": 1}}
               ]
-    try:
-        rows = DB['dis'].dois.aggregate(payload)
-    except Exception as err:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not get preprint year counts " \
-                                                    + "from dois collection"),
-                               message=error_message(err))
+    with mongo_guard("Could not get preprint year counts from dois collection"):
+        rows = list(DB['dis'].dois.aggregate(payload))
     stat = get_preprint_stats(rows)
     data = {'years': [], 'Journal article': [], 'Preprint': []}
     for key, val in stat.items():
-        if key < '2006':
-            continue
         data['years'].append(key)
         data['Journal article'].append(val['journal'])
         data['Preprint'].append(val['preprint'])
     payload = {"doi": {"$regex": "arxiv", "$options": "i"}}
-    try:
-        rows = DB['dis'].dois.find(payload)
-    except Exception as err:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not get arXiv DOIs"),
-                               message=error_message(err))
+    with mongo_guard("Could not get arXiv DOIs"):
+        rows = list(DB['dis'].dois.find(payload, {"_id": 0, "jrc_publishing_date": 1}))
     for row in rows:
         year = row['jrc_publishing_date'][:4]
         data['Preprint'][data['years'].index(year)] += 1
@@ -2621,7 +2901,7 @@ def dois_preprint_year():
     return make_response(render_template('bokeh.html', urlroot=request.url_root,
                                          title="DOIs preprint status by year", html=html,
                                          chartscript=chartscript, chartdiv=chartdiv,
-                                         navbar=generate_navbar('Preprints')))
+                                         navbar=NAVBARS['Preprints']))
 
 
 @app.route('/dois_month/<string:year>')
@@ -2629,20 +2909,15 @@ def dois_preprint_year():
 def dois_month(year=str(datetime.now().year)):
     ''' Show DOIs by month
     '''
-    payload = [{"$match": {"jrc_publishing_date": {"$regex": "^"+ year}}},
+    payload = [{"$match": {"jrc_publishing_date": year_match(year)}},
                {"$group": {"_id": {"month": {"$substrBytes": ["$jrc_publishing_date", 0, 7]},
                                    "obtained": "$jrc_obtained_from"
                                   },
                            "count": {"$sum": 1}}},
                {"$sort": {"_id.month": 1}}
               ]
-    try:
-        rows = DB['dis'].dois.aggregate(payload)
-    except Exception as err:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not get month counts " \
-                                                    + "from dois collection"),
-                               message=error_message(err))
+    with mongo_guard("Could not get month counts from dois collection"):
+        rows = list(DB['dis'].dois.aggregate(payload))
     data = {'months': [f"{mon:02}" for mon in range(1, 13)], 'Crossref': [0] * 12,
             'DataCite': [0] * 12}
     for row in rows:
@@ -2651,14 +2926,13 @@ def dois_month(year=str(datetime.now().year)):
     html = '<table id="years" class="tablesorter numbers"><thead><tr>' \
            + '<th>Month</th><th>Crossref</th><th>DataCite</th>' \
            + '</tr></thead><tbody>'
-    for mon in data['months']:
-        mname = date(1900, int(mon), 1).strftime('%B')
-        html += f"<tr><td>{mname}</td>"
+    for idx, mon in enumerate(data['months']):
+        html += f"<tr><td>{MONTH_NAMES[idx]}</td>"
         for source in app.config['SOURCES']:
-            if data[source][int(mon)-1]:
+            if data[source][idx]:
                 onclick = "onclick='nav_post(\"publishing_year\",\"" \
                           + f"{year}-{mon}" + "\",\"" + source + "\")'"
-                link = f"<a href='#' {onclick}>{data[source][int(mon)-1]:,}</a>"
+                link = f"<a href='#' {onclick}>{data[source][idx]:,}</a>"
                 html += f"<td>{link}</td>"
             else:
                 html += "<td></td>"
@@ -2671,44 +2945,40 @@ def dois_month(year=str(datetime.now().year)):
     return make_response(render_template('bokeh.html', urlroot=request.url_root,
                                          title=title, html=html,
                                          chartscript=chartscript, chartdiv=chartdiv,
-                                         navbar=generate_navbar('DOIs')))
+                                         navbar=NAVBARS['DOIs']))
 
 
 @app.route('/dois_pending')
 def dois_pending():
     ''' Show DOIs awaiting processing
     '''
-    try:
+    with mongo_guard("Could not get DOIs from dois_to_process collection"):
         cnt = DB['dis'].dois_to_process.count_documents({})
-        rows = DB['dis'].dois_to_process.find({})
-    except Exception as err:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not get DOIs " \
-                                                    + "from dois_to_process collection"),
-                               message=error_message(err))
-    html = '<table id="types" class="tablesorter numbers"><thead><tr>' \
-           + '<th>DOI</th><th>Inserted</th><th>Time waiting</th>' \
-           + '</tr></thead><tbody>'
+        rows = list(DB['dis'].dois_to_process.find({}))
     if not cnt:
         return render_template('warning.html', urlroot=request.url_root,
                                title=render_warning("No DOIs found", 'info'),
                                message="No DOIs are awaiting processing. This isn't an error," \
                                        + " it just means that we're all caught up on " \
                                        + "DOI processing.")
+    html = ['<table id="types" class="tablesorter numbers"><thead><tr>' \
+            + '<th>DOI</th><th>Inserted</th><th>Time waiting</th>' \
+            + '</tr></thead><tbody>']
+    now = datetime.now()
     for row in rows:
-        elapsed = datetime. now() - row['inserted']
+        elapsed = now - row['inserted']
+        hours, rem = divmod(elapsed.seconds, 3600)
+        minutes, seconds = divmod(rem, 60)
+        etime = f"{hours:02}:{minutes:02}:{seconds:02}"
         if elapsed.days:
-            etime = f"{elapsed.days} day{'s' if elapsed.days > 1 else ''}, " \
-                    + f"{elapsed.seconds // 3600:02}:{elapsed.seconds // 60 % 60:02}:" \
-                    + f"{elapsed.seconds % 60:02}"
-        else:
-            etime = f"{elapsed.seconds // 3600:02}:{elapsed.seconds // 60 % 60:02}:" \
-                    + f"{elapsed.seconds % 60:02}"
-        html += f"<tr><td>{doi_link(row['doi'])}</td><td>{row['inserted']}</td><td>{etime}</td>"
-    html += '</tbody></table>'
+            etime = f"{elapsed.days} day{'s' if elapsed.days > 1 else ''}, {etime}"
+        html.append(f"<tr><td>{doi_link(row['doi'])}</td><td>{row['inserted']}</td>" \
+                    + f"<td>{etime}</td></tr>")
+    html.append('</tbody></table>')
+    html = ''.join(html)
     return make_response(render_template('general.html', urlroot=request.url_root,
                                          title="DOIs awaiting processing", html=html,
-                                         navbar=generate_navbar('DOIs')))
+                                         navbar=NAVBARS['DOIs']))
 
 
 @app.route('/dois_publisher')
@@ -2719,39 +2989,37 @@ def dois_publisher():
                            "count":{"$sum": 1}}},
                {"$sort": {"_id.publisher": 1}}
               ]
-    try:
-        rows = DB['dis'].dois.aggregate(payload)
-    except Exception as err:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not get publishers " \
-                                                    + "from dois collection"),
-                               message=error_message(err))
+    with mongo_guard("Could not get publishers from dois collection"):
+        rows = cached('dois_publisher', lambda: list(DB['dis'].dois.aggregate(payload)),
+                      ttl=ROLLUP_TTL)
+    pubs = defaultdict(dict)
+    for row in rows:
+        rid = row['_id']
+        pubs[rid['publisher']].setdefault(rid['source'], row['count'])
+
+    def publisher_rows():
+        ''' Yield the table HTML for each publisher
+        '''
+        sources = app.config['SOURCES']
+        for pub, val in pubs.items():
+            # Publisher names are quoted for JavaScript, then escaped for the attribute
+            jspub = escape(json.dumps(pub))
+            yield f"<tr><td><a href='#' onclick='nav_post(\"publisher\",{jspub})'>" \
+                  + f"{escape(pub)}</a></td>"
+            for source in sources:
+                if source in val:
+                    yield f"<td><a href='#' onclick='nav_post(\"publisher\",{jspub}," \
+                          + f"\"{source}\")'>{val[source]:,}</a></td>"
+                else:
+                    yield "<td></td>"
+            yield "</tr>"
+
     html = '<table id="types" class="tablesorter numbers"><thead><tr>' \
            + '<th>Publisher</th><th>Crossref</th><th>DataCite</th>' \
-           + '</tr></thead><tbody>'
-    pubs = {}
-    for row in rows:
-        if row['_id']['publisher'] not in pubs:
-            pubs[row['_id']['publisher']] = {}
-        if row['_id']['source'] not in pubs[row['_id']['publisher']]:
-            pubs[row['_id']['publisher']][row['_id']['source']] = row['count']
-    for pub, val in pubs.items():
-        onclick = "onclick='nav_post(\"publisher\",\"" + pub + "\")'"
-        link = f"<a href='#' {onclick}>{pub}</a>"
-        html += f"<tr><td>{link}</td>"
-        for source in app.config['SOURCES']:
-            if source in val:
-                onclick = "onclick='nav_post(\"publisher\",\"" + pub \
-                          + "\",\"" + source + "\")'"
-                link = f"<a href='#' {onclick}>{val[source]:,}</a>"
-            else:
-                link = ""
-            html += f"<td>{link}</td>"
-        html += "</tr>"
-    html += '</tbody></table>'
+           + '</tr></thead><tbody>' + ''.join(publisher_rows()) + '</tbody></table>'
     return make_response(render_template('general.html', urlroot=request.url_root,
                                          title=f"DOI publishers ({len(pubs):,})", html=html,
-                                         navbar=generate_navbar('DOIs')))
+                                         navbar=NAVBARS['DOIs']))
 
 
 @app.route('/dois_tag')
@@ -2762,57 +3030,53 @@ def dois_tag():
                {"$project": {"_id": 0, "jrc_tag.name": 1, "jrc_obtained_from": 1}},
                {"$group": {"_id": {"tag": "$jrc_tag.name", "source": "$jrc_obtained_from"},
                            "count":{"$sum": 1}}},
-               {"$sort": {"_id.tag": 1}}
+               {"$sort": {"_id.tag": 1}},
+               {"$lookup": {"from": "suporg", "localField": "_id.tag", "foreignField": "name",
+                            "as": "org"}},
+               {"$project": {"count": 1,
+                             "org_status": {"$cond": [{"$eq": [{"$size": "$org"}, 0]}, "none",
+                                                      {"$cond": [{"$gt": [{"$size": "$org.active"},
+                                                                          0]},
+                                                                 "active", "inactive"]}]}}}
               ]
-    try:
-        orgs = DL.get_supervisory_orgs(DB['dis'].suporg)
-    except Exception as err:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not get supervisory orgs"),
-                               message=error_message(err))
-    try:
-        rows = DB['dis'].dois.aggregate(payload)
-    except Exception as err:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not get tags from dois collection"),
-                               message=error_message(err))
-    html = '<table id="types" class="tablesorter numbers"><thead><tr>' \
-           + '<th>Tag</th><th>SupOrg</th><th>Crossref</th><th>DataCite</th>' \
-           + '</tr></thead><tbody>'
-    tags = {}
+    with mongo_guard("Could not get tags from dois collection"):
+        rows = cached('dois_tag', lambda: list(DB['dis'].dois.aggregate(payload)),
+                      ttl=ROLLUP_TTL)
+    status = {"active": ("<span style='color: lime;'>Yes</span>", 'active'),
+              "inactive": ("<span style='color: yellow;'>Inactive</span>", 'other'),
+              "none": ("<span style='color: red;'>No</span>", 'other')}
+    tags = defaultdict(dict)
+    tagstatus = {}
     for row in rows:
-        if row['_id']['tag'] not in tags:
-            tags[row['_id']['tag']] = {}
-        if row['_id']['source'] not in tags[row['_id']['tag']]:
-            tags[row['_id']['tag']][row['_id']['source']] = row['count']
-    for tag, val in tags.items():
-        link = f"<a href='tag/{tag}'>{tag}</a>"
-        rclass = 'other'
-        if tag in orgs:
-            if 'active' in orgs[tag]:
-                org = "<span style='color: lime;'>Yes</span>"
-                rclass = 'active'
-            else:
-                org = "<span style='color: yellow;'>Inactive</span>"
-        else:
-            org = "<span style='color: red;'>No</span>"
-        html += f"<tr class={rclass}><td>{link}</td><td>{org}</td>"
-        for source in app.config['SOURCES']:
-            if source in val:
-                onclick = "onclick='nav_post(\"jrc_tag.name\",\"" + tag \
-                          + "\",\"" + source + "\")'"
-                link = f"<a href='#' {onclick}>{val[source]:,}</a>"
-            else:
-                link = ""
-            html += f"<td>{link}</td>"
-        html += "</tr>"
-    html += '</tbody></table>'
-    cbutton = "<button class=\"btn btn-outline-warning\" " \
-              + "onclick=\"$('.other').toggle();\">Filter for active SupOrgs</button>"
-    html = cbutton + html
+        rid = row['_id']
+        tags[rid['tag']].setdefault(rid['source'], row['count'])
+        tagstatus[rid['tag']] = row['org_status']
+
+    def tag_rows():
+        ''' Yield the table HTML for each tag
+        '''
+        sources = app.config['SOURCES']
+        for tag, val in tags.items():
+            etag = escape(tag)
+            jstag = escape(json.dumps(tag))
+            org, rclass = status[tagstatus[tag]]
+            yield f"<tr class={rclass}><td><a href='tag/{etag}'>{etag}</a></td><td>{org}</td>"
+            for source in sources:
+                if source in val:
+                    yield f"<td><a href='#' onclick='nav_post(\"jrc_tag.name\",{jstag}," \
+                          + f"\"{source}\")'>{val[source]:,}</a></td>"
+                else:
+                    yield "<td></td>"
+            yield "</tr>"
+
+    html = "<button class=\"btn btn-outline-warning\" " \
+           + "onclick=\"$('.other').toggle();\">Filter for active SupOrgs</button>" \
+           + '<table id="types" class="tablesorter numbers"><thead><tr>' \
+           + '<th>Tag</th><th>SupOrg</th><th>Crossref</th><th>DataCite</th>' \
+           + '</tr></thead><tbody>' + ''.join(tag_rows()) + '</tbody></table>'
     return make_response(render_template('general.html', urlroot=request.url_root,
                                          title=f"DOI tags ({len(tags):,})", html=html,
-                                         navbar=generate_navbar('Tag/affiliation')))
+                                         navbar=NAVBARS['Tag/affiliation']))
 
 
 @app.route('/dois_top', defaults={'num': 10})
@@ -2820,7 +3084,9 @@ def dois_tag():
 def dois_top(num):
     ''' Show a chart of DOIs by top tags
     '''
-    payload = [{"$unwind" : "$jrc_tag"},
+    payload = [{"$match": {"jrc_tag.name": {"$exists": True},
+                           "jrc_publishing_date": {"$exists": True}}},
+               {"$unwind" : "$jrc_tag"},
                {"$project": {"_id": 0, "jrc_tag.name": 1, "jrc_publishing_date": 1}},
                {"$group": {"_id": {"tag": "$jrc_tag.name",
                                    "year": {"$substrBytes": ["$jrc_publishing_date", 0, 4]}},
@@ -2828,36 +3094,22 @@ def dois_top(num):
                 },
                {"$sort": {"_id.year": 1, "_id.tag": 1}}
               ]
-    try:
-        rows = DB['dis'].dois.aggregate(payload)
-    except Exception as err:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not get tags from dois collection"),
-                               message=error_message(err))
+    with mongo_guard("Could not get tags from dois collection"):
+        rows = cached('dois_top', lambda: list(DB['dis'].dois.aggregate(payload)),
+                      ttl=ROLLUP_TTL)
     html = ""
-    ytags = {}
-    tags = {}
+    ytags = defaultdict(dict)
+    tags = defaultdict(int)
     data = {"years": []}
     for row in rows:
-        if row['_id']['tag'] not in tags:
-            tags[row['_id']['tag']] = 0
-        tags[row['_id']['tag']] += row['count']
-        if row['_id']['year'] not in ytags:
-            ytags[row['_id']['year']] = {}
-            data['years'].append(row['_id']['year'])
-        if row['_id']['tag'] not in ytags[row['_id']['year']]:
-            ytags[row['_id']['year']][row['_id']['tag']] = row['count']
+        rid = row['_id']
+        tags[rid['tag']] += row['count']
+        if rid['year'] not in ytags:
+            data['years'].append(rid['year'])
+        ytags[rid['year']].setdefault(rid['tag'], row['count'])
     top = sorted(tags, key=tags.get, reverse=True)[:num]
-    for year in data['years']:
-        for tag in sorted(tags):
-            if tag not in top:
-                continue
-            if tag not in data:
-                data[tag] = []
-            if tag in ytags[year]:
-                data[tag].append(ytags[year][tag])
-            else:
-                data[tag].append(0)
+    for tag in sorted(top):
+        data[tag] = [ytags[year].get(tag, 0) for year in data['years']]
     height = 600
     if num > 23:
         height += 22 * (num - 23)
@@ -2872,7 +3124,7 @@ def dois_top(num):
     return make_response(render_template('bokeh.html', urlroot=request.url_root,
                                          title="DOI tags by year/tag", html=html,
                                          chartscript=chartscript, chartdiv=chartdiv,
-                                         navbar=generate_navbar('Tag/affiliation')))
+                                         navbar=NAVBARS['Tag/affiliation']))
 
 
 @app.route('/dois_report/<string:year>')
@@ -2884,34 +3136,24 @@ def dois_report(year=str(datetime.now().year)):
             "preprints": "Preprints", "proceedings-article": "Proceedings articles",
             "book-chapter": "Book chapters", "datasets": "Datasets",
             "peer-review": "Peer reviews", "grant": "Grants", "other": "Other"}
-    payload = [{"$match": {"jrc_publishing_date": {"$regex": "^"+ year}}},
+    payload = [{"$match": {"jrc_publishing_date": year_match(year)}},
                {"$group": {"_id": {"type": "$type", "subtype": "$subtype",
                                    "DataCite": "$types.resourceTypeGeneral"}, "count": {"$sum": 1}}}
               ]
     coll = DB['dis'].dois
-    try:
-        rows = coll.aggregate(payload)
-    except Exception as err:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not get yearly metrics " \
-                                                    + "from dois collection"),
-                               message=error_message(err))
+    with mongo_guard("Could not get yearly metrics from dois collection"):
+        rows = list(coll.aggregate(payload))
     typed = counts_by_type(rows)
     first, last, anyauth = get_first_last_authors(year)
     stat = {}
     # Journal count
     payload = [{"$unwind" : "$container-title"},
                {"$match": {"container-title": {"$exists": True}, "type": "journal-article",
-                           "jrc_publishing_date": {"$regex": "^"+ year}}},
+                           "jrc_publishing_date": year_match(year)}},
                {"$group": {"_id": "$container-title", "count":{"$sum": 1}}}
               ]
-    try:
-        rows = coll.aggregate(payload)
-    except Exception as err:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not get journal metrics " \
-                                                    + "from dois collection"),
-                               message=error_message(err))
+    with mongo_guard("Could not get journal metrics from dois collection"):
+        rows = list(coll.aggregate(payload))
     cnt = 0
     for row in rows:
         if row['_id']:
@@ -2946,19 +3188,15 @@ def dois_report(year=str(datetime.now().year)):
             stat[val] += "<br>"
     # figshare (unversioned only)
     payload = [{"$match": {"doi": {"$regex": "janelia.[0-9]+$"},
-                          "jrc_publishing_date": {"$regex": "^"+ year}}},
+                          "jrc_publishing_date": year_match(year)}},
                {"$unwind": "$jrc_author"},
                {"$group": {"_id": "$jrc_author", "count": {"$sum": 1}}}]
-    try:
+    with mongo_guard("Could not get journal figshare stats"):
         cnt = coll.count_documents(payload[0]['$match'])
-        stat['figshare'] = f"<span style='font-weight: bold'>{cnt:,}</span> " \
-                           + "figshare (unversioned) articles"
-        sheet.append(f"figshare (unversioned) articles\t{cnt}")
-        rows = coll.aggregate(payload)
-    except Exception as err:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not get journal figshare stats"),
-                               message=error_message(err))
+        rows = list(coll.aggregate(payload))
+    stat['figshare'] = f"<span style='font-weight: bold'>{cnt:,}</span> " \
+                       + "figshare (unversioned) articles"
+    sheet.append(f"figshare (unversioned) articles\t{cnt}")
     if cnt:
         cnt = 0
         for row in rows:
@@ -2967,27 +3205,17 @@ def dois_report(year=str(datetime.now().year)):
                             + "Janelia authors<br>"
         sheet.append(f"\tJanelia authors\t{cnt}")
     # ORCID stats
-    orcs = {}
-    try:
-        ocoll = DB['dis'].orcid
-        rows = ocoll.find({})
-    except Exception as err:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not get orcid collection entries"),
-                               message=error_message(err))
-    for row in rows:
-        if 'employeeId' in row and 'orcid' in row:
-            orcs[row['employeeId']] = True
-    payload = [{"$match": {"jrc_publishing_date": {"$regex": "^"+ year}}},
+    with mongo_guard("Could not get orcid collection entries"):
+        orcs = {row['employeeId'] for row in
+                DB['dis'].orcid.find({"employeeId": {"$exists": True},
+                                      "orcid": {"$exists": True}},
+                                     {"_id": 0, "employeeId": 1})}
+    payload = [{"$match": {"jrc_publishing_date": year_match(year)}},
                {"$unwind": "$jrc_author"},
                {"$group": {"_id": "$jrc_author", "count": {"$sum": 1}}}
               ]
-    try:
-        rows = coll.aggregate(payload)
-    except Exception as err:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not get jrc_authors"),
-                               message=error_message(err))
+    with mongo_guard("Could not get jrc_authors"):
+        rows = list(coll.aggregate(payload))
     cnt = orc = 0
     for row in rows:
         cnt += 1
@@ -2996,7 +3224,7 @@ def dois_report(year=str(datetime.now().year)):
     stat['ORCID'] = f"<span style='font-weight: bold'>{cnt:,}</span> " \
                     + "distinct Janelia authors for all entries, " \
                     + f"<span style='font-weight: bold'>{orc:,}</span> " \
-                    + f"({orc/cnt*100:.2f}%) with ORCIDs"
+                    + f"({orc/cnt*100 if cnt else 0:.2f}%) with ORCIDs"
     sheet.extend([f"Distinct Janelia authors\t{cnt}", f"Janelia authors with ORCIDs\t{orc}"])
     # Entries
     if 'DataCite' not in typed:
@@ -3012,21 +3240,15 @@ def dois_report(year=str(datetime.now().year)):
     if 'Preprints' not in stat:
         stat['Preprints'] = "<span style='font-weight: bold'>0</span> preprints<br>"
     # Authors
-    try:
-        rows = coll.find({"jrc_publishing_date": {"$regex": "^"+ year}})
-    except Exception as err:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not get frc_author metrics " \
-                                                    + "from dois collection"),
-                               message=error_message(err))
     total = cnt = middle = 0
-    for row in rows:
-        total += 1
-        field = 'creators' if 'creators' in row else 'author'
-        if 'jrc_author' in row and len(row['jrc_author']) == len(row[field]):
-            cnt += 1
-        elif 'jrc_author' not in row:
-            middle += 1
+    with mongo_guard("Could not get frc_author metrics from dois collection"):
+        for row in coll.find({"jrc_publishing_date": year_match(year)}):
+            total += 1
+            field = 'creators' if 'creators' in row else 'author'
+            if 'jrc_author' in row and len(row['jrc_author']) == len(row[field]):
+                cnt += 1
+            elif 'jrc_author' not in row:
+                middle += 1
     stat['Author'] = f"<span style='font-weight: bold'>{cnt:,}</span> " \
                      + "entries with all Janelia authors<br>"
     stat['Author'] += f"<span style='font-weight: bold'>{total-cnt:,}</span> " \
@@ -3060,25 +3282,17 @@ def dois_report(year=str(datetime.now().year)):
             break
     # Tags
     payload = [{"$match": {"jrc_tag": {"$exists": True}, "jrc_obtained_from": "Crossref",
-                           "jrc_publishing_date": {"$regex": "^"+ year}}},
-               {"$project": {"doi": 1, "type": "$type", "numtags": {"$size": "$jrc_tag"}}}
+                           "jrc_publishing_date": year_match(year),
+                           "type": {"$in": ["journal-article", "posted-content"]}}},
+               {"$group": {"_id": None, "count": {"$sum": 1},
+                           "total": {"$sum": {"$size": "$jrc_tag"}}}}
               ]
-    try:
-        rows = coll.aggregate(payload)
-    except Exception as err:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not get frc_author metrics " \
-                                                    + "from dois collection"),
-                               message=error_message(err))
-    cnt = total = 0
-    for row in rows:
-        if 'type' not in row or row['type'] not in ('journal-article', 'posted-content'):
-            continue
-        cnt += 1
-        total += row['numtags']
-    stat['Tags'] = f"<span style='font-weight: bold'>{total/cnt:.1f}</span> " \
+    with mongo_guard("Could not get frc_author metrics from dois collection"):
+        rows = list(coll.aggregate(payload))
+    avg = rows[0]['total'] / rows[0]['count'] if rows and rows[0]['count'] else 0
+    stat['Tags'] = f"<span style='font-weight: bold'>{avg:.1f}</span> " \
                    + "average tags per tagged entry"
-    sheet.append(f"Average tags per tagged entry\t{total/cnt:.1f}")
+    sheet.append(f"Average tags per tagged entry\t{avg:.1f}")
     sheet = create_downloadable(f"{year}_in_review", None, "\n".join(sheet))
     html = f"<h2 class='dark'>Entries</h2>{stat['Entries']}<br>" \
            + f"<h2 class='dark'>Articles</h2>{stat['Journal articles']}" \
@@ -3094,61 +3308,49 @@ def dois_report(year=str(datetime.now().year)):
     html += '<br>' + year_pulldown('dois_report', all_years=False)
     return make_response(render_template('general.html', urlroot=request.url_root,
                                          title=f"{year}", html=html,
-                                         navbar=generate_navbar('DOIs')))
+                                         navbar=NAVBARS['DOIs']))
 
 
 @app.route('/dois_year')
 def dois_year():
     ''' Show publishing years with counts
     '''
-    payload = [{"$group": {"_id": {"year": {"$substrBytes": ["$jrc_publishing_date", 0, 4]},
+    payload = [{"$match": {"jrc_publishing_date": {"$gte": str(FIRST_YEAR)}}},
+               {"$group": {"_id": {"pdate": "$jrc_publishing_date",
                                    "source": "$jrc_obtained_from"
                                   },
-                           "count": {"$sum": 1}}},
-               {"$sort": {"_id.pdate": -1}}
+                           "count": {"$sum": 1}}}
               ]
-    try:
-        rows = DB['dis'].dois.aggregate(payload)
-    except Exception as err:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not get tags from dois collection"),
-                               message=error_message(err))
-    html = '<table id="years" class="tablesorter numbers"><thead><tr>' \
-           + '<th>Year</th><th>Crossref</th><th>DataCite</th>' \
-           + '</tr></thead><tbody>'
-    years = {}
+    with mongo_guard("Could not get tags from dois collection"):
+        rows = list(DB['dis'].dois.aggregate(payload, batchSize=BATCH_SIZE))
+    years = defaultdict(lambda: defaultdict(int))
     for row in rows:
-        if row['_id']['year'] not in years:
-            years[row['_id']['year']] = {}
-        if row['_id']['source'] not in years[row['_id']['year']]:
-            years[row['_id']['year']][row['_id']['source']] = row['count']
-    data = {"years": [], "Crossref": [], "DataCite": []}
-    for year in sorted(years, reverse=True):
-        if year < '2006':
-            continue
-        data['years'].insert(0, str(year))
-        onclick = "onclick='nav_post(\"publishing_year\",\"" + year + "\")'"
-        link = f"<a href='#' {onclick}>{year}</a>"
-        html += f"<tr><td>{link}</td>"
-        for source in app.config['SOURCES']:
-            if source in years[year]:
-                data[source].insert(0, years[year][source])
-                onclick = "onclick='nav_post(\"publishing_year\",\"" + year \
-                          + "\",\"" + source + "\")'"
-                link = f"<a href='#' {onclick}>{years[year][source]:,}</a>"
-            else:
-                data[source].insert(0, 0)
-                link = ""
-            html += f"<td>{link}</td>"
-        html += "</tr>"
-    html += '</tbody></table>'
+        years[row['_id']['pdate'][:4]][row['_id']['source']] += row['count']
+    sources = app.config['SOURCES']
+    data = {"years": sorted(years)}
+    for source in sources:
+        data[source] = [years[year].get(source, 0) for year in data['years']]
+
+    def table_rows():
+        ''' Yield table rows (most recent year first) for the template to render
+        '''
+        for year in reversed(data['years']):
+            cells = [f"<a href='#' onclick='nav_post(\"publishing_year\",\"{year}\")'>{year}</a>"]
+            for source in sources:
+                cnt = years[year].get(source, 0)
+                cells.append(f"<a href='#' onclick='nav_post(\"publishing_year\",\"{year}\"," \
+                             + f"\"{source}\")'>{cnt:,}</a>" if cnt else "")
+            yield {"cells": cells}
+
+    html = render_template('table.html', tid='years', tclass='numbers',
+                           header=['Year', 'Crossref', 'DataCite'], rows=table_rows())
     chartscript, chartdiv = DP.stacked_bar_chart(data, "DOIs published by year/source",
-                                                 xaxis="years", yaxis=app.config['SOURCES'],
+                                                 xaxis="years", yaxis=sources,
                                                  colors=DP.SOURCE_PALETTE)
     return make_response(render_template('bokeh.html', urlroot=request.url_root,
                                          title="DOIs published by year", html=html,
                                          chartscript=chartscript, chartdiv=chartdiv,
-                                         navbar=generate_navbar('DOIs')))
+                                         navbar=NAVBARS['DOIs']))
 
 
 @app.route('/dois_insertpicker')
@@ -3163,7 +3365,7 @@ def show_insert_picker():
     return make_response(render_template('picker.html', urlroot=request.url_root,
                                          title="DOI lookup by insertion date", before=before,
                                          start=start, stop=str(date.today()),
-                                         after=after, navbar=generate_navbar('DOIs')))
+                                         after=after, navbar=NAVBARS['DOIs']))
 
 
 @app.route('/doiui/insert/<string:idate>')
@@ -3177,58 +3379,66 @@ def show_insert(idate):
         raise InvalidUsage(str(err), 400) from err
     try:
         rows = DB['dis'].dois.find({"jrc_inserted": {"$gte" : isodate}},
-                                   {'_id': 0}).sort([("jrc_obtained_from", 1), ("jrc_inserted", 1)])
+                                   {"_id": 0, "doi": 1, "jrc_obtained_from": 1, "type": 1,
+                                    "subtype": 1, "types.resourceTypeGeneral": 1,
+                                    "jrc_publishing_date": 1, "jrc_load_source": 1,
+                                    "jrc_inserted": 1, "relation.is-version-of": 1,
+                                    "jrc_newsletter": 1}
+                                  ).sort([("jrc_obtained_from", 1), ("jrc_inserted", 1)]) \
+                                  .batch_size(BATCH_SIZE)
     except Exception as err:
         return render_template('error.html', urlroot=request.url_root,
                                title=render_warning("Could not get DOIs"),
                                message=error_message(err))
-    if not rows:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("DOIs not found"),
-                               message=f"No DOIs were inserted on or after {idate}")
-    html = '<table id="dois" class="tablesorter numbers"><thead><tr>' \
-           + '<th>DOI</th><th>Source</th><th>Type</th><th>Published</th><th>Load source</th>' \
-           + '<th>Inserted</th><th>Is version of</th><th>Newsletter</th></tr></thead><tbody>'
-    fileoutput = ""
-    limit = weeks_ago(2)
+    trows = []
+    fileoutput = StringIO()
+    # Local names for lookups in the row loop
+    append = trows.append
+    write = fileoutput.write
+    link_doi = doi_link
+    limit = str(weeks_ago(2))
     for row in rows:
-        source = row['jrc_load_source'] if row['jrc_load_source'] else ""
-        typ = subtype = ""
-        if 'type' in row:
-            typ = row['type']
-            if 'subtype' in row:
-                subtype = row['subtype']
+        source = row.get('jrc_load_source') or ""
+        subtype = ""
+        typ = row.get('type')
+        if typ:
+            subtype = row.get('subtype', "")
+            if subtype:
                 typ += f" {subtype}"
-        elif 'types' in row and 'resourceTypeGeneral' in row['types']:
-            typ = row['types']['resourceTypeGeneral']
-        version = []
-        if 'relation' in row and 'is-version-of' in row['relation']:
-            for ver in row['relation']['is-version-of']:
-                if ver['id-type'] == 'doi':
-                    version.append(ver['id'])
-        version = doi_link(version) if version else ""
-        news = row['jrc_newsletter'] if 'jrc_newsletter' in row else ""
+        else:
+            typ = (row.get('types') or {}).get('resourceTypeGeneral', "")
+        version = [ver['id'] for ver in (row.get('relation') or {}).get('is-version-of', [])
+                   if ver['id-type'] == 'doi']
+        version = link_doi(version) if version else ""
+        news = row.get('jrc_newsletter', "")
         if (not news) and (row['jrc_obtained_from'] == 'Crossref') and \
-           (row['jrc_publishing_date'] >= str(limit)) \
+           (row['jrc_publishing_date'] >= limit) \
            and (typ == 'journal-article' or subtype == 'preprint'):
             rclass = 'candidate'
         else:
             rclass = 'other'
-        html += f"<tr class='{rclass}'><td>" \
-                + "</td><td>".join([doi_link(row['doi']), row['jrc_obtained_from'], typ,
-                                    row['jrc_publishing_date'], source,
-                                    str(row['jrc_inserted']), version,
-                                    news]) + "</td></tr>"
-        frow = "\t".join([row['doi'], row['jrc_obtained_from'], typ, row['jrc_publishing_date'],
-                          source, str(row['jrc_inserted']), version, news])
-        fileoutput += f"{frow}\n"
-    html += '</tbody></table>'
+        inserted = str(row['jrc_inserted'])
+        append({"cls": rclass,
+                "cells": [link_doi(row['doi']), row['jrc_obtained_from'], typ,
+                          row['jrc_publishing_date'], source, inserted, version, news]})
+        write("\t".join([row['doi'], row['jrc_obtained_from'], typ, row['jrc_publishing_date'],
+                         source, inserted, version, news]))
+        write("\n")
+    if not trows:
+        return render_template('error.html', urlroot=request.url_root,
+                               title=render_warning("DOIs not found"),
+                               message=f"No DOIs were inserted on or after {idate}")
     cbutton = "<button class=\"btn btn-outline-warning\" " \
               + "onclick=\"$('.other').toggle();\">Filter for candidate DOIs</button>"
-    html = create_downloadable("jrc_inserted", None, fileoutput) + f" &nbsp;{cbutton}{html}"
+    html = create_downloadable("jrc_inserted", None, fileoutput.getvalue()) \
+           + f" &nbsp;{cbutton}" \
+           + render_template('table.html', tid='dois', tclass='numbers',
+                             header=['DOI', 'Source', 'Type', 'Published', 'Load source',
+                                     'Inserted', 'Is version of', 'Newsletter'],
+                             rows=trows)
     return make_response(render_template('general.html', urlroot=request.url_root,
                                          title=f"DOIs inserted on or after {idate}", html=html,
-                                         navbar=generate_navbar('DOIs')))
+                                         navbar=NAVBARS['DOIs']))
 
 
 @app.route('/doiui/custom', methods=['OPTIONS', 'POST'])
@@ -3273,37 +3483,35 @@ def show_doiui_custom():
         ptitle = ''
     print(f"Custom payload: {payload}")
     try:
-        rows = DB['dis'].dois.find(payload)
+        rows = DB['dis'].dois.find(payload, WORKS_EXCLUDE).sort("jrc_publishing_date", -1) \
+                             .batch_size(BATCH_SIZE)
     except Exception as err:
         return render_template('error.html', urlroot=request.url_root,
                                title=render_warning("Could not get DOIs"),
                                message=error_message(err))
-    if not rows:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("DOIs not found"),
-                               message=f"No DOIs were found for {ipd['field']}={display_value}")
     header = ['Published', 'DOI', 'Title']
-    html = "<table id='dois' class='tablesorter standard'><thead><tr>" \
-           + ''.join([f"<th>{itm}</th>" for itm in header]) + "</tr></thead><tbody>"
-    works = []
+    trows = []
+    fileoutput = StringIO()
     for row in rows:
         published = DL.get_publishing_date(row)
         title = DL.get_title(row)
         if not title:
             title = ""
-        works.append({"published": published, "link": doi_link(row['doi']), "title": title,
-                      "doi": row['doi']})
-    fileoutput = ""
-    for row in sorted(works, key=lambda row: row['published'], reverse=True):
-        html += "<tr><td>" + dloop(row, ['published', 'link', 'title'], "</td><td>") + "</td></tr>"
-        row['title'] = row['title'].replace("\n", " ")
-        fileoutput += dloop(row, ['published', 'doi', 'title']) + "\n"
-    html += '</tbody></table>'
-    html = create_downloadable(ipd['field'], header, fileoutput) + html
-    html = f"DOIs: {len(works)}<br>" + html
+        trows.append({"cells": [published, doi_link(row['doi']), title]})
+        fileoutput.write("\t".join([str(published), row['doi'], title.replace("\n", " ")]))
+        fileoutput.write("\n")
+    if not trows:
+        target = f"{ipd['field']}={display_value}" if request.form else "this query"
+        return render_template('error.html', urlroot=request.url_root,
+                               title=render_warning("DOIs not found"),
+                               message=f"No DOIs were found for {target}")
+    html = create_downloadable(ipd['field'], header, fileoutput.getvalue()) \
+           + render_template('table.html', tid='dois', tclass='standard', header=header,
+                             rows=trows)
+    html = f"DOIs: {len(trows)}<br>" + html
     return make_response(render_template('general.html', urlroot=request.url_root,
                                          title=ptitle, html=html,
-                                         navbar=generate_navbar('DOIs')))
+                                         navbar=NAVBARS['DOIs']))
 
 
 # ******************************************************************************
@@ -3318,37 +3526,35 @@ def show_journal_ui(jname, year='All'):
         payload = {"$or": [{"container-title": jname},
                            {"institution.name": jname}]}
         if year != 'All':
-            payload['jrc_publishing_date'] = {"$regex": "^"+ year}
+            payload['jrc_publishing_date'] = year_match(year)
         rows = DB['dis'].dois.find(payload,
                                    {"jrc_publishing_date": 1, "doi": 1,
-                                    "title": 1}).sort("jrc_publishing_date", -1)
+                                    "title": 1}).sort("jrc_publishing_date", -1) \
+                                  .batch_size(BATCH_SIZE)
     except Exception as err:
         return render_template('error.html', urlroot=request.url_root,
                                title=render_warning("Could not get DOIs"),
                                message=error_message(err))
     header = ['Published', 'DOI', 'Title']
-    html = "<table id='dois' class='tablesorter standard'><thead><tr><th>"
-    html += "</th><th>".join(header)
-    html += "</th></tr></thead><tbody>"
-    cnt = 0
-    fileoutput = ""
+    trows = []
+    fileoutput = StringIO()
     for row in rows:
-        cnt += 1
-        html += f"<tr><td>{row['jrc_publishing_date']}</td><td>{doi_link(row['doi'])}</td>" \
-                + f"<td>{row['title'][0]}</td></tr>"
-        fileoutput += f"{row['jrc_publishing_date']}\t{row['doi']}\t{row['title'][0]}\n"
-    html += '</tbody></table>'
+        trows.append({"cells": [row['jrc_publishing_date'], doi_link(row['doi']),
+                                row['title'][0]]})
+        fileoutput.write(f"{row['jrc_publishing_date']}\t{row['doi']}\t{row['title'][0]}\n")
+    cnt = len(trows)
+    html = render_template('table.html', tid='dois', tclass='standard', header=header,
+                           rows=trows)
     fname = 'journals'
     if year != 'All':
         fname += f"_{year}"
-    print(fname)
-    html = create_downloadable(fname, header, fileoutput) + html
+    html = create_downloadable(fname, header, fileoutput.getvalue()) + html
     title = f"DOIs for {jname} ({cnt})"
     if year != 'All':
         title += f" (year={year})"
     return make_response(render_template('general.html', urlroot=request.url_root,
                                             title=title, html=html,
-                                            navbar=generate_navbar('Journals')))
+                                            navbar=NAVBARS['Journals']))
 
 # ******************************************************************************
 # * UI endpoints (ORCID)                                                       *
@@ -3358,9 +3564,7 @@ def show_oid_ui(oid):
     ''' Show ORCID user
     '''
     try:
-        resp = requests.get(f"{app.config['ORCID']}{oid}",
-                            headers={"Accept": "application/json"}, timeout=10)
-        data = resp.json()
+        data = get_orcid_record(oid)
     except Exception as err:
         return render_template('error.html', urlroot=request.url_root,
                                title=render_warning("Could not retrieve ORCID ID"),
@@ -3394,7 +3598,7 @@ def show_oid_ui(oid):
     return make_response(render_template('general.html', urlroot=request.url_root,
                                          title=f"<a href='https://orcid.org/{oid}' " \
                                                + f"target='_blank'>{oid}</a>", html=html,
-                                         navbar=generate_navbar('ORCID')))
+                                         navbar=NAVBARS['ORCID']))
 
 
 @app.route('/userui/<string:eid>')
@@ -3414,7 +3618,7 @@ def show_user_ui(eid):
                                message="Could not find any information for this employee ID")
     return make_response(render_template('general.html', urlroot=request.url_root,
                                          title=f"User ID {eid}", html=orciddata,
-                                         navbar=generate_navbar('ORCID')))
+                                         navbar=NAVBARS['ORCID']))
 
 
 @app.route('/unvaluserui/<string:iid>')
@@ -3435,78 +3639,77 @@ def show_unvaluser_ui(iid):
                                        + "collection ID")
     return make_response(render_template('general.html', urlroot=request.url_root,
                                          title="User has no ORCID or employee ID",
-                                         html=orciddata, navbar=generate_navbar('ORCID')))
+                                         html=orciddata, navbar=NAVBARS['ORCID']))
 
 
 @app.route('/namesui/<string:name>')
 def show_names_ui(name):
     ''' Show user names
     '''
-    payload = {"$or": [{"family": {"$regex": name, "$options" : "i"}},
-                       {"given": {"$regex": name, "$options" : "i"}},
+    rex = re.escape(name)
+    payload = {"$or": [{"family": {"$regex": rex, "$options" : "i"}},
+                       {"given": {"$regex": rex, "$options" : "i"}},
                       ]}
     try:
-        if not DB['dis'].orcid.count_documents(payload):
-            return render_template('warning.html', urlroot=request.url_root,
-                                   title=render_warning("Could not find name", 'warning'),
-                                    message=f"Could not find any names matching {name}")
         rows = DB['dis'].orcid.find(payload).collation({"locale": "en"}).sort("family", 1)
+        html, count = generate_user_table(rows)
     except Exception as err:
         return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not count names in dois collection"),
+                               title=render_warning("Could not get names from orcid collection"),
                                message=error_message(err))
-    html, count = generate_user_table(rows)
+    if not count:
+        return render_template('warning.html', urlroot=request.url_root,
+                               title=render_warning("Could not find name", 'warning'),
+                               message=f"Could not find any names matching {name}")
     html = f"Search term: {name}<br>" + html
     return make_response(render_template('general.html', urlroot=request.url_root,
                                          title=f"Authors: {count:,}", html=html,
-                                         navbar=generate_navbar('ORCID')))
+                                         navbar=NAVBARS['ORCID']))
 
 
 @app.route('/orcid_tag')
 def orcid_tag():
     ''' Show ORCID tags (affiliations) with counts
     '''
-    payload = [{"$unwind" : "$affiliations"},
-               {"$project": {"_id": 0, "affiliations": 1, "orcid": 1}},
+    payload = [{"$match": {"affiliations": {"$exists": True}}},
+               {"$unwind" : "$affiliations"},
                {"$group": {"_id": "$affiliations", "count":{"$sum": 1},
                            "orcid": {"$push": "$orcid"}}},
                {"$sort": {"_id": 1}}
               ]
     try:
-        orgs = DL.get_supervisory_orgs(DB['dis'].suporg)
+        orgs = get_supervisory_orgs()
     except Exception as err:
         return render_template('error.html', urlroot=request.url_root,
                                title=render_warning("Could not get supervisory orgs"),
                                message=error_message(err))
     try:
-        rows = DB['dis'].orcid.aggregate(payload)
+        rows = DB['dis'].orcid.aggregate(payload, batchSize=BATCH_SIZE)
     except Exception as err:
         return render_template('error.html', urlroot=request.url_root,
                                title=render_warning("Could not get affiliations " \
                                                     + "from orcid collection"),
                                message=error_message(err))
-    html = "<button class=\"btn btn-outline-warning\" " \
-              + "onclick=\"$('.other').toggle();\">Filter for active SupOrgs</button>"
-    html += '<table id="types" class="tablesorter numbers"><thead><tr>' \
-            + '<th>Affiliation</th><th>SupOrg</th><th>Authors</th><th>ORCID %</th>' \
-            + '</tr></thead><tbody>'
-    count = 0
+    trows = []
+    # Local names for lookups in the row loop
+    append = trows.append
+    esc = escape
     for row in rows:
-        count += 1
-        link = f"<a href='tag/{escape(row['_id'])}'>{row['_id']}</a>"
-        link2 = f"<a href='/affiliation/{escape(row['_id'])}'>{row['count']:,}</a>"
+        aff = esc(row['_id'])
+        link = f"<a href='tag/{aff}'>{row['_id']}</a>"
+        link2 = f"<a href='/affiliation/{aff}'>{row['count']:,}</a>"
         rclass = 'other'
-        if row['_id'] in orgs:
-            if orgs[row['_id']]:
-                if 'active' in orgs[row['_id']]:
-                    org = "<span style='color: lime;'>Yes</span>"
-                    rclass = 'active'
-                else:
-                    org = "<span style='color: yellow;'>Inactive</span>"
-            else:
-                org = "<span style='color: yellow;'>No code</span>"
-        else:
+        # False marks an affiliation that isn't a supervisory org (an org may have no code)
+        org = orgs.get(row['_id'], False)
+        if org is False:
             org = "<span style='color: red;'>No</span>"
+        elif not org:
+            org = "<span style='color: yellow;'>No code</span>"
+        elif 'active' in org:
+            org = "<span style='color: lime;'>Yes</span>"
+            rclass = 'active'
+        else:
+            org = "<span style='color: yellow;'>Inactive</span>"
         perc = float(f"{len(row['orcid'])/row['count']*100:.2f}")
         if perc == 100.0:
             perc = "<span style='color: lime;'>100.00%</span>"
@@ -3514,61 +3717,72 @@ def orcid_tag():
             perc = f"<span style='color: yellow;'>{perc}%</span>"
         else:
             perc = f"<span style='color: red;'>{perc}%</span>"
-        html += f"<tr class={rclass}><td>{link}</td><td>{org}</td><td>{link2}</td>" \
-                + f"<td>{perc}</td></tr>"
-    html += '</tbody></table>'
+        append({"cls": rclass, "cells": [link, org, link2, perc]})
+    html = "<button class=\"btn btn-outline-warning\" " \
+           + "onclick=\"$('.other').toggle();\">Filter for active SupOrgs</button>" \
+           + render_template('table.html', tid='types', tclass='numbers',
+                             header=['Affiliation', 'SupOrg', 'Authors', 'ORCID %'], rows=trows)
     return make_response(render_template('general.html', urlroot=request.url_root,
-                                         title=f"Author affiliations ({count:,})", html=html,
-                                         navbar=generate_navbar('Tag/affiliation')))
+                                         title=f"Author affiliations ({len(trows):,})", html=html,
+                                         navbar=NAVBARS['Tag/affiliation']))
 
 
 @app.route('/orcid_entry')
 def orcid_entry():
     ''' Show ORCID users with counts
     '''
-    payload = {"$and": [{"orcid": {"$exists": True}}, {"employeeId": {"$exists": True}},
-                        {"alumni": {"$exists": False}}]}
+    # Count entries by which of these fields exist
+    fields = ("orcid", "employeeId", "alumni", "affiliations", "group")
+    payload = [{"$group": {"_id": {fld: {"$ne": [{"$type": f"${fld}"}, "missing"]}
+                                   for fld in fields},
+                           "count": {"$sum": 1}}}]
     try:
-        cntb = DB['dis'].orcid.count_documents(payload)
-        payload["$and"][1]["employeeId"]["$exists"] = False
-        cnto = DB['dis'].orcid.count_documents(payload)
-        payload["$and"][0]["orcid"]["$exists"] = False
-        payload["$and"][1]["employeeId"]["$exists"] = True
-        cnte = DB['dis'].orcid.count_documents(payload)
-        cntj = DB['dis'].orcid.count_documents({"alumni": {"$exists": False}})
-        cnta = DB['dis'].orcid.count_documents({"alumni": {"$exists": True}})
-        payload = {"$and": [{"affiliations": {"$exists": False}}, {"group": {"$exists": False}},
-                            {"alumni": {"$exists": False}}]}
-        cntf = DB['dis'].orcid.count_documents(payload)
+        rows = DB['dis'].orcid.aggregate(payload)
     except Exception as err:
         return render_template('error.html', urlroot=request.url_root,
                                title=render_warning("Could not get affiliations " \
                                                     + "from orcid collection"),
                                message=error_message(err))
+    cntb = cnto = cnte = cntj = cnta = cntf = 0
+    for row in rows:
+        has = row['_id']
+        if has['alumni']:
+            cnta += row['count']
+            continue
+        cntj += row['count']
+        if has['orcid'] and has['employeeId']:
+            cntb += row['count']
+        elif has['orcid']:
+            cnto += row['count']
+        elif has['employeeId']:
+            cnte += row['count']
+        if not (has['affiliations'] or has['group']):
+            cntf += row['count']
     total = cntj + cnta
     data = {}
-    html = '<table id="types" class="tablesorter standard"><tbody>'
-    html += f"<tr><td>Entries in collection</td><td>{total:,}</td></tr>"
-    html += f"<tr><td>Current Janelians</td><td>{cntj:,} ({cntj/total*100:.2f}%)</td></tr>"
-    html += f"<tr><td>&nbsp;&nbsp;Janelians with ORCID and employee ID</td><td>{cntb:,}" \
-            + f" ({cntb/cntj*100:.2f}%)</td></tr>"
+    html = ['<table id="types" class="tablesorter standard"><tbody>',
+            f"<tr><td>Entries in collection</td><td>{total:,}</td></tr>",
+            f"<tr><td>Current Janelians</td><td>{cntj:,} ({cntj/total*100:.2f}%)</td></tr>",
+            f"<tr><td>&nbsp;&nbsp;Janelians with ORCID and employee ID</td><td>{cntb:,}" \
+            + f" ({cntb/cntj*100:.2f}%)</td></tr>",
+            f"<tr><td>&nbsp;&nbsp;Janelians with ORCID only</td><td>{cnto:,}" \
+            + f" ({cnto/cntj*100:.2f}%)</td></tr>",
+            f"<tr><td>&nbsp;&nbsp;Janelians with employee ID only</td><td>{cnte:,}" \
+            + f" ({cnte/cntj*100:.2f}%)</td></tr>",
+            f"<tr><td>&nbsp;&nbsp;Janelians without affiliations/groups</td><td>{cntf:,}</td></tr>",
+            f"<tr><td>Alumni</td><td>{cnta:,} ({cnta/total*100:.2f}%)</td></tr>",
+            '</tbody></table>']
+    html = "".join(html)
     data['Janelians with ORCID and employee ID'] = cntb
-    html += f"<tr><td>&nbsp;&nbsp;Janelians with ORCID only</td><td>{cnto:,}" \
-            + f" ({cnto/cntj*100:.2f}%)</td></tr>"
     data['Janelians with ORCID only'] = cnto
-    html += f"<tr><td>&nbsp;&nbsp;Janelians with employee ID only</td><td>{cnte:,}" \
-            + f" ({cnte/cntj*100:.2f}%)</td></tr>"
     data['Janelians with employee ID only'] = cnte
-    html += f"<tr><td>&nbsp;&nbsp;Janelians without affiliations/groups</td><td>{cntf:,}</td></tr>"
-    html += f"<tr><td>Alumni</td><td>{cnta:,} ({cnta/total*100:.2f}%)</td></tr>"
     data['Alumni'] = cnta
-    html += '</tbody></table>'
     chartscript, chartdiv = DP.pie_chart(data, "ORCID entries", "type", height=500, width=600,
                                          colors=DP.TYPE_PALETTE, location="top_right")
     return make_response(render_template('bokeh.html', urlroot=request.url_root,
                                          title="ORCID entries", html=html,
                                          chartscript=chartscript, chartdiv=chartdiv,
-                                         navbar=generate_navbar('ORCID')))
+                                         navbar=NAVBARS['ORCID']))
 
 
 @app.route('/affiliation/<string:aff>')
@@ -3586,7 +3800,8 @@ def orcid_affiliation(aff):
     html = f"<p>Number of tagged DOIs: {cnt:,}</p>"
     payload = {"affiliations": aff}
     try:
-        rows = DB['dis'].orcid.find(payload).collation({"locale": "en"}).sort("family", 1)
+        rows = DB['dis'].orcid.find(payload).collation({"locale": "en"}) \
+                             .sort("family", 1).batch_size(BATCH_SIZE)
     except Exception as err:
         return render_template('error.html', urlroot=request.url_root,
                                title=render_warning("Could not get affiliations from " \
@@ -3596,55 +3811,52 @@ def orcid_affiliation(aff):
     return make_response(render_template('general.html', urlroot=request.url_root,
                                          title=f"{aff} affiliation ({count:,})",
                                          html=html + additional,
-                                         navbar=generate_navbar('ORCID')))
+                                         navbar=NAVBARS['ORCID']))
 
 
 @app.route('/orcid_duplicates')
 def orcid_duplicates():
     ''' Show ORCID duplicate records
     '''
-    html = ""
+    html = []
     for check in ("employeeId", "orcid"):
-        payload = [{"$sortByCount": f"${check}"},
-                   {"$match": {"_id": {"$ne": None}, "count": {"$gt": 1}}}
+        payload = [{"$match": {check: {"$ne": None}}},
+                   {"$group": {"_id": f"${check}", "count": {"$sum": 1},
+                               "docs": {"$push": {"given": "$given", "family": "$family",
+                                                  "orcid": "$orcid",
+                                                  "userIdO365": "$userIdO365"}}}},
+                   {"$match": {"count": {"$gt": 1}}},
+                   {"$sort": {"count": -1}}
                   ]
         try:
-            rowsobj = DB['dis'].orcid.aggregate(payload)
+            rows = list(DB['dis'].orcid.aggregate(payload))
         except Exception as err:
             return render_template('error.html', urlroot=request.url_root,
                                    title=render_warning(f"Could not get duplicate {check}s " \
                                                         + "from orcid collection"),
                                    message=error_message(err))
-        rows = []
-        for row in rowsobj:
-            rows.append(row)
-        if rows:
-            if check == 'employeeId':
-                html += f"{check}<table id='duplicates' class='tablesorter standard'><thead><tr>" \
-                        + "<th>Name</th><th>ORCIDs</th></tr></thead><tbody>"
-            else:
-                html += f"{check}<table id='duplicates' class='tablesorter standard'><thead><tr>" \
-                        + "<th>Name</th><th>User IDs</th></tr></thead><tbody>"
-            for row in rows:
-                try:
-                    recs = DB['dis'].orcid.find({"employeeId": row['_id']})
-                except Exception as err:
-                    return render_template('error.html', urlroot=request.url_root,
-                                           title=render_warning("Could not get ORCID data for " \
-                                                                + row['_id']),
-                                           message=error_message(err))
-                names = []
-                other = []
-                for rec in recs:
-                    names.append(f"{rec['given'][0]} {rec['family'][0]}")
+        if not rows:
+            continue
+        trows = []
+        for row in rows:
+            names = []
+            other = []
+            for rec in row['docs']:
+                names.append(f"{rec['given'][0]} {rec['family'][0]}")
+                if check == 'employeeId' and 'orcid' in rec:
                     other.append(f"<a href=\"https://orcid.org/{rec['orcid']}\">{rec['orcid']}</a>")
-                html += f"<tr><td>{', '.join(names)}</td><td>{', '.join(other)}</td></tr>"
-            html += '</tbody></table>'
-        if not html:
-            html = "<p>No duplicates found</p>"
+                elif check == 'orcid' and 'userIdO365' in rec:
+                    other.append(f"<a href='/userui/{rec['userIdO365']}'>{rec['userIdO365']}</a>")
+            trows.append({"cells": [', '.join(names), ', '.join(other)]})
+        html.append(check)
+        html.append(render_template('table.html', tid='duplicates', tclass='standard',
+                                    header=['Name', 'ORCIDs' if check == 'employeeId' \
+                                                    else 'User IDs'],
+                                    rows=trows))
+    html = "".join(html) if html else "<p>No duplicates found</p>"
     return make_response(render_template('general.html', urlroot=request.url_root,
                                          title="ORCID duplicates", html=html,
-                                         navbar=generate_navbar('ORCID')))
+                                         navbar=NAVBARS['ORCID']))
 
 
 # ******************************************************************************
@@ -3654,11 +3866,15 @@ def orcid_duplicates():
 def peoporgsle():
     ''' Show information on supervisory orgs
     '''
-    payload = [{"$unwind": "$affiliations"},
-               {"$project": {"_id": 0, "affiliations": 1}},
+    # Tag counts are only refreshed every ROLLUP_TTL seconds
+    etag = period_etag('orgs', ROLLUP_TTL)
+    if request.if_none_match.contains(etag):
+        return conditional_response(make_response(""), etag)
+    payload = [{"$match": {"affiliations": {"$exists": True}}},
+               {"$unwind": "$affiliations"},
                {"$group": {"_id": "$affiliations", "count": {"$sum": 1}}}]
     try:
-        rows = DB['dis'].orcid.aggregate(payload)
+        rows = DB['dis'].orcid.aggregate(payload, batchSize=BATCH_SIZE)
     except Exception as err:
         return render_template('error.html', urlroot=request.url_root,
                                title=render_warning("Could not get affiliations from " \
@@ -3668,39 +3884,37 @@ def peoporgsle():
     for row in rows:
         aff[row['_id']] = row['count']
     try:
-        orgs = DL.get_supervisory_orgs()
+        orgs = get_supervisory_orgs(from_db=False)
     except Exception as err:
         return render_template('error.html', urlroot=request.url_root,
                                title=render_warning("Could not get supervisory orgs"),
                                message=error_message(err))
-    payload = [{"$unwind": "$jrc_tag"},
-               {"$project": {"_id": 0, "jrc_tag.name": 1}},
-               {"$group": {"_id": "$jrc_tag.name", "count": {"$sum": 1}}}]
     try:
-        rows = DB['dis'].dois.aggregate(payload)
+        counts = get_tag_counts()
     except Exception as err:
         return render_template('error.html', urlroot=request.url_root,
                                title=render_warning("Could not get affiliations from " \
                                                     + "orcid collection"),
                                message=error_message(err))
-    tag = {}
-    for row in rows:
-        if isinstance(row['_id'], dict):
-            continue
-        tag[row['_id']] = row['count']
-    html = "<table id='orgs' class='tablesorter numbers'><thead><tr><th>Name</th><th>Code</th>" \
-           + "<th>Authors</th><th>DOI tags</th></tr></thead><tbody>"
-    for key, val in sorted(orgs.items()):
-        alink = f"<a href='/affiliation/{escape(key)}'>{aff[key]}</a>" if key in aff else ''
+    tag = {name: sum(counts[name].values()) for name in orgs if name in counts}
+    trows = []
+    append, aff_get, tag_get = trows.append, aff.get, tag.get
+    for key, val in orgs.items():
+        acnt = aff_get(key)
+        alink = f"<a href='/affiliation/{escape(key)}'>{acnt}</a>" if acnt else ''
+        tcnt = tag_get(key)
         tlink = ""
-        if key in tag:
-            onclick = "onclick='nav_post(\"jrc_tag.name\",\"" + key + "\")'"
-            tlink = f"<a href='#' {onclick}>{tag[key]}</a>"
-        html += f"<tr><td>{key}</td><td>{val}</td><td>{alink}</td><td>{tlink}</td></tr>"
-    html += "</tbody></table>"
-    return make_response(render_template('general.html', urlroot=request.url_root,
-                                         title=f"Supervisory organizations ({len(orgs):,})",
-                                         html=html, navbar=generate_navbar('External systems')))
+        if tcnt:
+            # Quoted for JavaScript, then escaped for the attribute
+            onclick = f"onclick='nav_post(\"jrc_tag.name\",{escape(json.dumps(key))})'"
+            tlink = f"<a href='#' {onclick}>{tcnt}</a>"
+        append({"cells": [escape(key), escape(str(val)), alink, tlink]})
+    html = render_template('table.html', tid='orgs', tclass='numbers',
+                           header=['Name', 'Code', 'Authors', 'DOI tags'], rows=trows)
+    response = make_response(render_template('general.html', urlroot=request.url_root,
+                                             title=f"Supervisory organizations ({len(orgs):,})",
+                                             html=html, navbar=NAVBARS['External systems']))
+    return conditional_response(response, etag)
 
 
 # ******************************************************************************
@@ -3714,7 +3928,7 @@ def people(name=None):
     if not name:
         return make_response(render_template('people.html', urlroot=request.url_root,
                                              title="Search People system", content="",
-                                             navbar=generate_navbar('ORCID')))
+                                             navbar=NAVBARS['ORCID']))
     try:
         response = JRC.call_people_by_name(name)
     except Exception as err:
@@ -3726,21 +3940,21 @@ def people(name=None):
                                              title="Search People system",
                                              content="<br><h3>No names found containing " \
                                                      + f"\"{name}\"</h3>",
-                                             navbar=generate_navbar('ORCID')))
-    html = "<br><br><h3>Select a name for details:</h3>"
-    html += "<table id='people' class='tablesorter standard'><thead><tr><th>Name</th>" \
-            + "<th>Title</th><th>Location</th></tr></thead><tbody>"
+                                             navbar=NAVBARS['ORCID']))
+    trows = []
     for rec in response:
-        pname = f"{rec['nameFirstPreferred']} {rec['nameLastPreferred']}"
-        link = f"<a href='/peoplerec/{rec['userIdO365']}'>{pname}</a>"
-        loc = rec['locationName'] if 'locationName' in rec else ""
+        pname = escape(f"{rec['nameFirstPreferred']} {rec['nameLastPreferred']}")
+        link = f"<a href='/peoplerec/{escape(rec['userIdO365'])}'>{pname}</a>"
+        loc = escape(rec.get('locationName', ""))
         if "Janelia" in loc:
             loc = f"<span style='color:lime'>{loc}</span>"
-        html += f"<tr><td>{link}</td><td>{rec['businessTitle']}</td><td>{loc}</td></tr>"
-    html += "</tbody></table>"
+        trows.append({"cells": [link, escape(rec['businessTitle']), loc]})
+    html = "<br><br><h3>Select a name for details:</h3>" \
+           + render_template('table.html', tid='people', tclass='standard',
+                             header=['Name', 'Title', 'Location'], rows=trows)
     return make_response(render_template('people.html', urlroot=request.url_root,
                                          title="Search People system", content=html,
-                                         navbar=generate_navbar('External systems')))
+                                         navbar=NAVBARS['External systems']))
 
 
 @app.route('/peoplerec/<string:eid>')
@@ -3764,10 +3978,11 @@ def peoplerec(eid):
     if 'photoURL' in rec:
         title += f"&nbsp;<img src='{rec['photoURL']}' width=100 height=100 " \
                  + f"alt='Photo of {rec['nameFirstPreferred']}'>"
-    html = f"<div class='scroll' style='height:750px'><pre>{json.dumps(rec, indent=2)}</pre></div>"
+    rec = orjson.dumps(rec, option=orjson.OPT_INDENT_2).decode()
+    html = f"<div class='scroll' style='height:750px'><pre>{escape(rec)}</pre></div>"
     return make_response(render_template('general.html', urlroot=request.url_root,
                                          title=title, html=html,
-                                         navbar=generate_navbar('External systems')))
+                                         navbar=NAVBARS['External systems']))
 
 # ******************************************************************************
 # * UI endpoints (stats)                                                       *
@@ -3778,9 +3993,22 @@ def stats_database():
     '''
     collection = {}
     try:
-        cnames = DB['dis'].list_collection_names()
-        for cname in cnames:
-            stat = DB['dis'].command('collStats', cname)
+        dbstat = DB['dis'].command('dbStats')
+    except Exception as err:
+        return render_template('error.html', urlroot=request.url_root,
+                               title=render_warning("Could not get database stats"),
+                               message=error_message(err))
+    # Sizes change on any write, so they identify the current version of the page
+    etag = "-".join(str(dbstat[key]) for key in ('objects', 'dataSize', 'indexes', 'indexSize'))
+    if request.if_none_match.contains(etag):
+        return conditional_response(make_response(""), etag)
+    try:
+        cnames = sorted(DB['dis'].list_collection_names())
+        # Run collStats concurrently (PyMongo releases the GIL while waiting on the server)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            collstats = dict(zip(cnames, executor.map(partial(DB['dis'].command, 'collStats'),
+                                                      cnames)))
+        for cname, stat in collstats.items():
             indices = []
             for key, val in stat['indexSizes'].items():
                 indices.append(f"{key} ({humansize(val, space='mem')})")
@@ -3797,29 +4025,28 @@ def stats_database():
         return render_template('error.html', urlroot=request.url_root,
                                title=render_warning("Could not get collection stats"),
                                message=error_message(err))
-    html = '<table id="collections" class="tablesorter numbercenter"><thead><tr>' \
-           + '<th>Collection</th><th>Documents</th><th>Avg. document size</th><th>Size</th>' \
-            + '<th>Free space</th><th>Indices</th></tr></thead><tbody>'
-    for coll, val in sorted(collection.items()):
-        html += f"<tr><td>{coll}</td><td>" + dloop(val, ['docs', 'docsize', 'size', 'free', 'idx'],
-                                                   "</td><td>") + "</td></tr>"
-    html += '</tbody>'
-    stat = DB['dis'].command('dbStats')
-    val = {"objects": f"{stat['objects']:,}",
-              "avgObjSize": humansize(stat['avgObjSize'], space='mem'),
-              "storageSize": humansize(stat['storageSize'], space='mem'),
+    html = ['<table id="collections" class="tablesorter numbercenter"><thead><tr>' \
+            + '<th>Collection</th><th>Documents</th><th>Avg. document size</th><th>Size</th>' \
+            + '<th>Free space</th><th>Indices</th></tr></thead><tbody>']
+    for coll, val in collection.items():
+        html.append(f"<tr><td>{coll}</td><td>" \
+                    + dloop(val, ['docs', 'docsize', 'size', 'free', 'idx'], "</td><td>") \
+                    + "</td></tr>")
+    html.append('</tbody>')
+    val = {"objects": f"{dbstat['objects']:,}",
+              "avgObjSize": humansize(dbstat['avgObjSize'], space='mem'),
+              "storageSize": humansize(dbstat['storageSize'], space='mem'),
               "blank": "",
-              "indexSize": f"{stat['indexes']} indices " \
-                           + f"({humansize(stat['indexSize'], space='mem')})"}
-    html += '<tfoot>'
-    html += "<tr><th style='text-align:right'>TOTAL</th><th style='text-align:center'>" \
-            + dloop(val, ['objects', 'avgObjSize', 'storageSize', 'blank', 'indexSize'],
-                    "</th><th style='text-align:center'>") + "</th></tr>"
-    html += '</tfoot>'
-    html += '</table>'
-    return make_response(render_template('general.html', urlroot=request.url_root,
-                                         title="Database statistics", html=html,
-                                         navbar=generate_navbar('Stats')))
+              "indexSize": f"{dbstat['indexes']} indices " \
+                           + f"({humansize(dbstat['indexSize'], space='mem')})"}
+    html.append("<tfoot><tr><th style='text-align:right'>TOTAL</th>" \
+                + "<th style='text-align:center'>" \
+                + dloop(val, ['objects', 'avgObjSize', 'storageSize', 'blank', 'indexSize'],
+                        "</th><th style='text-align:center'>") + "</th></tr></tfoot></table>")
+    response = make_response(render_template('general.html', urlroot=request.url_root,
+                                             title="Database statistics", html="".join(html),
+                                             navbar=NAVBARS['Stats']))
+    return conditional_response(response, etag)
 
 # ******************************************************************************
 # * UI endpoints (tags)                                                        *
@@ -3828,65 +4055,70 @@ def stats_database():
 def tagrec(tag):
     ''' Show a single tag
     '''
-    payload = {"affiliations": tag}
-    try:
-        acnt = DB['dis'].orcid.count_documents(payload)
-    except Exception as err:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not get users for tag"),
-                               message=error_message(err))
+    def affiliation_count():
+        ''' Return the number of authors with this tag as an affiliation
+        '''
+        payload = {"affiliations": tag}
+        if not DB['dis'].orcid.find_one(payload, {"_id": 1}):
+            return 0
+        return DB['dis'].orcid.count_documents(payload)
+
+    # The orcid and dois queries are independent, so run them concurrently
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        afuture = executor.submit(affiliation_count)
+        dfuture = executor.submit(get_tag_counts)
+        try:
+            acnt = afuture.result()
+        except Exception as err:
+            return render_template('error.html', urlroot=request.url_root,
+                                   title=render_warning("Could not get users for tag"),
+                                   message=error_message(err))
+        try:
+            orgs = get_supervisory_orgs()
+        except Exception as err:
+            return render_template('error.html', urlroot=request.url_root,
+                                   title=render_warning("Could not get supervisory orgs"),
+                                   message=error_message(err))
+        try:
+            pdict = dfuture.result().get(tag, {})
+        except Exception as err:
+            return render_template('error.html', urlroot=request.url_root,
+                                   title=render_warning("Could not get DOIs for tag"),
+                                   message=error_message(err))
     tagtype = "Affiliation" if acnt else ""
-    try:
-        orgs = DL.get_supervisory_orgs(DB['dis'].suporg)
-    except Exception as err:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not get supervisory orgs"),
-                               message=error_message(err))
-    payload = [{"$match": {"jrc_tag.name": tag}},
-               {"$unwind": "$jrc_tag"},
-               {"$match": {"jrc_tag.name": tag}},
-               {"$group": {"_id": "$jrc_tag.type", "count": {"$sum": 1}}},
-               {"$sort": {"_id": 1}}
-              ]
-    try:
-        rows = DB['dis'].dois.aggregate(payload)
-    except Exception as err:
-        return render_template('error.html', urlroot=request.url_root,
-                               title=render_warning("Could not get DOIs for tag"),
-                               message=error_message(err))
-    html = "<table id='tagprops' class='proplist'><thead></thead><tbody>"
-    pdict = {}
-    for row in rows:
-        pdict[row['_id']] = row['count']
+    html = ["<table id='tagprops' class='proplist'><thead></thead><tbody>"]
     if not pdict and not acnt:
         return render_template('warning.html', urlroot=request.url_root,
-                               title=render_warning(f"Could not find tag {tag}", 'warning'),
+                               title=render_warning(f"Could not find tag {escape(tag)}",
+                                                    'warning'),
                                message="No DOI tags or user affiliations found")
     parr = []
     for key, val in pdict.items():
         parr.append(f"{key}: {val}")
     if tag in orgs:
         tagtype = 'Supervisory org'
-        html += f"<tr><td>Tag type</td><td>{tagtype}</td></tr>"
-        html += f"<tr><td>Code</td><td>{orgs[tag]['code']}</td></tr>"
-        html += "<tr><td>Status</td><td>"
+        html.append(f"<tr><td>Tag type</td><td>{tagtype}</td></tr>")
+        html.append(f"<tr><td>Code</td><td>{escape(orgs[tag]['code'])}</td></tr>")
         if 'active' in orgs[tag]:
-            html += "<span style='color: lime;'>Active</span></td></tr>"
+            html.append("<tr><td>Status</td><td>" \
+                        + "<span style='color: lime;'>Active</span></td></tr>")
         else:
-            html += "<span style='color: yellow;'>Inactive</span></td></tr>"
+            html.append("<tr><td>Status</td><td>" \
+                        + "<span style='color: yellow;'>Inactive</span></td></tr>")
     else:
-        html += f"<tr><td>Tag type</td><td>{tagtype}</td></tr>"
+        html.append(f"<tr><td>Tag type</td><td>{tagtype}</td></tr>")
     if pdict:
-        onclick = "onclick='nav_post(\"jrc_tag.name\",\"" + tag + "\")'"
+        # Quoted for JavaScript, then escaped for the attribute
+        onclick = f"onclick='nav_post(\"jrc_tag.name\",{escape(json.dumps(tag))})'"
         link = f"<a href='#' {onclick}>Show DOIs</a>"
-        html += f"<tr><td>Appears in DOI tags</td><td>{'<br>'.join(parr)}<br>{link}</td></tr>"
+        html.append(f"<tr><td>Appears in DOI tags</td><td>{'<br>'.join(parr)}<br>{link}</td></tr>")
     if acnt:
         link = f"<a href='/affiliation/{escape(tag)}'>Show authors</a>"
-        html += f"<tr><td>Authors with affiliation</td><td>{acnt}<br>{link}</td></tr>"
-    html += "</tbody></table>"
+        html.append(f"<tr><td>Authors with affiliation</td><td>{acnt}<br>{link}</td></tr>")
+    html.append("</tbody></table>")
     return make_response(render_template('general.html', urlroot=request.url_root,
-                                         title=f"Tag {tag}", html=html,
-                                         navbar=generate_navbar('Tag/affiliation')))
+                                         title=f"Tag {escape(tag)}", html="".join(html),
+                                         navbar=NAVBARS['Tag/affiliation']))
 
 # ******************************************************************************
 # * Multi-role endpoints (ORCID)                                               *
@@ -3909,9 +4141,15 @@ def show_groups():
     result = initialize_result()
     expected = 'html' if 'Accept' in request.headers \
                          and 'html' in request.headers['Accept'] else 'json'
+    etag = period_etag('groups', 300)
+    if expected == 'html' and request.if_none_match.contains(etag):
+        return conditional_response(make_response(""), etag)
     payload = {"group": {"$exists": True}}
+    # The HTML table only needs the fields it displays
+    project = {'_id': 0} if expected == 'json' \
+              else {'_id': 0, 'given': 1, 'family': 1, 'orcid': 1, 'group': 1, 'affiliations': 1}
     try:
-        rows = DB['dis'].orcid.find(payload, {'_id': 0}).sort("group", 1)
+        rows = DB['dis'].orcid.find(payload, project).sort("group", 1).batch_size(BATCH_SIZE)
     except Exception as err:
         if expected == 'html':
             return render_template('error.html', urlroot=request.url_root,
@@ -3920,28 +4158,32 @@ def show_groups():
         raise InvalidUsage(str(err), 500) from err
     if expected == 'json':
         result['rest']['source'] = 'mongo'
-        result['data'] = []
-        for row in rows:
-            result['data'].append(row)
-        result['rest']['row_count'] = len(result['data'])
-        return generate_response(result)
-    html = '<table class="standard"><thead><tr><th>Name</th><th>ORCID</th><th>Group</th>' \
-           + '<th>Affiliations</th></tr></thead><tbody>'
-    count = 0
+        return generate_stream_response(result, rows)
+    html = ['<table class="standard"><thead><tr><th>Name</th><th>ORCID</th><th>Group</th>' \
+            + '<th>Affiliations</th></tr></thead><tbody>']
     for row in rows:
-        count += 1
         if 'affiliations' not in row:
             row['affiliations'] = ''
         link = f"<a href='/orcidui/{row['orcid']}'>{row['orcid']}</a>" if 'orcid' in row else ''
-        html += f"<tr><td>{row['given'][0]} {row['family'][0]}</td>" \
-                + f"<td style='width: 180px'>{link}</td><td>{row['group']}</td>" \
-                + f"<td>{', '.join(row['affiliations'])}</td></tr>"
-    html += '</tbody></table>'
-    return render_template('general.html', urlroot=request.url_root, title=f"Groups ({count:,})",
-                           html=html, navbar=generate_navbar('ORCID'))
+        html.append(f"<tr><td>{row['given'][0]} {row['family'][0]}</td>" \
+                    + f"<td style='width: 180px'>{link}</td><td>{row['group']}</td>" \
+                    + f"<td>{', '.join(row['affiliations'])}</td></tr>")
+    # One row per group owner, after the header
+    count = len(html) - 1
+    html.append('</tbody></table>')
+    response = make_response(render_template('general.html', urlroot=request.url_root,
+                                             title=f"Groups ({count:,})", html="".join(html),
+                                             navbar=NAVBARS['ORCID']))
+    return conditional_response(response, etag)
 
 # *****************************************************************************
 
+# Connect when the worker starts, so the first request doesn't wait on it
+try:
+    initialize_database()
+except Exception as err:
+    print(f"Could not connect to database at startup: {err}")
+
 if __name__ == '__main__':
     if app.config["RUN_MODE"] == 'dev':
         app.run(debug=app.config["DEBUG"])
@@ -0,0 +1,120 @@
+''' create_indexes.py
+    Create indexes used by the DIS UI/API
+'''
+
+import argparse
+import collections
+from operator import attrgetter
+import sys
+import jrc_common.jrc_common as JRC
+
+# pylint: disable=broad-exception-caught,logging-fstring-interpolation
+
+# Database
+DB = {}
+# Indexes (collection: list of [keys, options])
+INDEXES = {"dois": [[[("jrc_publishing_date", 1), ("jrc_obtained_from", 1)], {}],
+                    [[("jrc_publishing_date", 1), ("type", 1)], {}],
+                    [[("jrc_tag.name", 1), ("jrc_tag.type", 1)], {}],
+                    [[("jrc_obtained_from", 1), ("jrc_inserted", 1)], {}],
+                    [[("jrc_inserted", 1)], {}],
+                    [[("author.family", 1), ("author.given", 1)], {}],
+                    [[("creators.familyName", 1), ("creators.givenName", 1)], {}],
+                   ],
+           "orcid": [[[("affiliations", 1), ("alumni", 1)], {}],
+                     [[("affiliations", 1)], {"collation": {"locale": "en"}}],
+                     [[("family", 1)], {"collation": {"locale": "en"}}],
+                     [[("given", 1)], {"collation": {"locale": "en"}}],
+                     [[("group", 1)], {}],
+                    ],
+          }
+# Counters
+COUNT = collections.defaultdict(lambda: 0, {})
+
+
+def terminate_program(msg=None):
+    ''' Terminate the program gracefully
+        Keyword arguments:
+          msg: error message or object
+        Returns:
+          None
+    '''
+    if msg:
+        if not isinstance(msg, str):
+            msg = f"An exception of type {type(msg).__name__} occurred. Arguments:\n{msg.args}"
+        LOGGER.critical(msg)
+    sys.exit(-1 if msg else 0)
+
+
+def initialize_program():
+    ''' Initialize program
+        Keyword arguments:
+          None
+        Returns:
+          None
+    '''
+    try:
+        dbconfig = JRC.get_config("databases")
+    except Exception as err:
+        terminate_program(err)
+    dbs = ['dis']
+    for source in dbs:
+        dbo = attrgetter(f"{source}.{ARG.MANIFOLD}.write")(dbconfig)
+        LOGGER.info("Connecting to %s %s on %s as %s", dbo.name, ARG.MANIFOLD, dbo.host, dbo.user)
+        try:
+            DB[source] = JRC.connect_database(dbo)
+        except Exception as err:
+            terminate_program(err)
+
+
+def create_indexes():
+    ''' Create any indexes that don't already exist
+        Keyword arguments:
+          None
+        Returns:
+          None
+    '''
+    for cname, indexes in INDEXES.items():
+        coll = DB['dis'][cname]
+        try:
+            existing = [list(idx['key'].items()) for idx in coll.list_indexes()]
+        except Exception as err:
+            terminate_program(err)
+        for keys, options in indexes:
+            COUNT['read'] += 1
+            if keys in existing:
+                LOGGER.debug(f"Index {keys} already exists on {cname}")
+                COUNT['existing'] += 1
+                continue
+            LOGGER.info(f"Creating index {keys} {options} on {cname}")
+            if not ARG.WRITE:
+                continue
+            try:
+                coll.create_index(keys, **options)
+                COUNT['created'] += 1
+            except Exception as err:
+                terminate_program(err)
+    print(f"Indexes read:     {COUNT['read']}")
+    print(f"Indexes existing: {COUNT['existing']}")
+    print(f"Indexes created:  {COUNT['created']}")
+
+
+# -----------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    PARSER = argparse.ArgumentParser(
+        description="Create indexes used by the DIS UI/API")
+    PARSER.add_argument('--manifold', dest='MANIFOLD', action='store',
+                        default='prod', choices=['dev', 'prod'],
+                        help='MongoDB manifold (dev, prod)')
+    PARSER.add_argument('--write', dest='WRITE', action='store_true',
+                        default=False, help='Actually create indexes')
+    PARSER.add_argument('--verbose', dest='VERBOSE', action='store_true',
+                        default=False, help='Flag, Chatty')
+    PARSER.add_argument('--debug', dest='DEBUG', action='store_true',
+                        default=False, help='Flag, Very chatty')
+    ARG = PARSER.parse_args()
+    LOGGER = JRC.setup_logging(ARG)
+    initialize_program()
+    create_indexes()
+    terminate_program()